@@ -3,7 +3,7 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from app.db.base_class import Base
-from app.models import threat, analysis, source
+from app.models import threat, analysis, source, ioc
 from app.core.config import settings
 
 from alembic import context
@@ -0,0 +1,78 @@
+"""Add ioc ip_address inet column
+
+Revision ID: 15bfe5c96937
+Revises: 98c84cffd319
+Create Date: 2026-10-17 12:41:30.865112
+
+"""
+import ipaddress
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '15bfe5c96937'
+down_revision: Union[str, None] = '98c84cffd319'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+# Frozen copy of app.services.ioc_service.ip_value at this revision
+def _ip_value(value: str) -> Optional[str]:
+    try:
+        if "/" in value:
+            return str(ipaddress.ip_network(value, strict=False))
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        host, _, port = value.rpartition(":")
+        if host and port.isdigit() and host.count(":") == 0:
+            try:
+                return str(ipaddress.ip_address(host))
+            except ValueError:
+                return None
+        return None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ioc', sa.Column('ip_address', postgresql.INET(), nullable=True))
+
+    # Fill inet values for existing IP-bearing IOCs in id order, one batch at a time
+    bind = op.get_bind()
+    ioc = sa.table('ioc', sa.column('id', sa.Integer), sa.column('type', sa.String), sa.column('value', sa.String), sa.column('ip_address', postgresql.INET))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(ioc.c.id, ioc.c.value)
+            .where(ioc.c.id > last_id, ioc.c.type.in_(['ip', 'c2_server', 'cidr']))
+            .order_by(ioc.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = [
+            {'ioc_id': row.id, 'ip': ip}
+            for row in rows
+            if (ip := _ip_value(row.value))
+        ]
+        if updates:
+            bind.execute(
+                ioc.update().where(ioc.c.id == sa.bindparam('ioc_id')).values(ip_address=sa.bindparam('ip')),
+                updates,
+            )
+        last_id = rows[-1].id
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_ioc_ip_address', 'ioc', ['ip_address'], unique=False, postgresql_using='gist', postgresql_ops={'ip_address': 'inet_ops'}, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_ioc_ip_address', table_name='ioc', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('ioc', 'ip_address')
@@ -0,0 +1,41 @@
+"""Add threat full-text search vector
+
+Revision ID: 15e76dae4e62
+Revises: 90c0e804682d
+Create Date: 2026-10-17 11:27:09.418553
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '15e76dae4e62'
+down_revision: Union[str, None] = '90c0e804682d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.models.threat.THREAT_SEARCH_VECTOR_EXPRESSION at this revision
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', left(coalesce(raw_content, ''), 10000)), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Adding a stored generated column rewrites the threat table; schedule accordingly
+    op.add_column('threat', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_threat_search_vector', 'threat', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_threat_search_vector', table_name='threat', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('threat', 'search_vector')
@@ -0,0 +1,55 @@
+"""Add ioc and threat_ioc tables
+
+Revision ID: 43b8488803d6
+Revises: 718a68b34fbf
+Create Date: 2026-10-17 09:12:41.502318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '43b8488803d6'
+down_revision: Union[str, None] = '718a68b34fbf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ioc',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.String(length=2048), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('type', 'value', name='uq_ioc_type_value')
+    )
+    op.create_index('ix_ioc_value', 'ioc', ['value'], unique=False)
+    op.create_table('threat_ioc',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('threat_id', sa.Integer(), nullable=False),
+    sa.Column('ioc_id', sa.Integer(), nullable=False),
+    sa.Column('confidence', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['ioc_id'], ['ioc.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['threat_id'], ['threat.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('threat_id', 'ioc_id', name='uq_threat_ioc_threat_id_ioc_id')
+    )
+    op.create_index('ix_threat_ioc_ioc_id_threat_id', 'threat_ioc', ['ioc_id', 'threat_id'], unique=False)
+    # Existing Threat.iocs data is copied over online, in batches, by
+    # `python -m app.scripts.backfill_iocs` once this migration is applied.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_threat_ioc_ioc_id_threat_id', table_name='threat_ioc')
+    op.drop_table('threat_ioc')
+    op.drop_index('ix_ioc_value', table_name='ioc')
+    op.drop_table('ioc')
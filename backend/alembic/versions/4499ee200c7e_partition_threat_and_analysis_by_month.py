@@ -0,0 +1,180 @@
+"""Partition threat and analysis by month on created_at
+
+Revision ID: 4499ee200c7e
+Revises: d5c591a37f3b
+Create Date: 2026-10-17 14:52:09.613204
+
+The existing table is renamed to <table>_legacy and attached, unchanged, as the
+partition holding every row created before the cutover (the first day of next
+month). A validated CHECK constraint lets ATTACH skip its scan, and the unique
+(id, created_at) index is built concurrently up front and promoted to a UNIQUE
+constraint, which ATTACH reuses for the parent's primary key instead of
+building one. The swap itself therefore only holds locks for catalog changes. Later months get their own partitions, created
+ahead of time by app.services.partition_service.
+
+Downgrade detaches the legacy partition, copies the rows of the monthly
+partitions back into it and drops the partitioned parent, so it rewrites
+every row created since the cutover. Rows in partitions already archived and
+dropped by the retention job are not restored; reload them from the archive
+exports first if they are needed.
+
+"""
+from datetime import date
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4499ee200c7e'
+down_revision: Union[str, None] = 'd5c591a37f3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('threat', 'analysis')
+MONTHS_AHEAD = 3
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _cutover() -> date:
+    return _add_months(date.today().replace(day=1), 1)
+
+
+def _index_definitions(bind, table: str) -> List[sa.Row]:
+    """Indexes of `table` that do not back a constraint (those are recreated explicitly)"""
+    return bind.execute(sa.text(
+        "SELECT i.indexname, i.indexdef FROM pg_indexes i "
+        "WHERE i.schemaname = current_schema() AND i.tablename = :table "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname)"
+    ), {'table': table}).all()
+
+
+def _foreign_keys(bind, table: str) -> List[sa.Row]:
+    return bind.execute(sa.text(
+        "SELECT conname, pg_get_constraintdef(oid) AS definition FROM pg_constraint "
+        "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"
+    ), {'table': table}).all()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cutover = _cutover()
+
+    # threat_ioc cannot reference a partitioned table by id alone; links are
+    # cleaned up by ThreatService and the retention job from here on
+    op.drop_constraint('threat_ioc_threat_id_fkey', 'threat_ioc', type_='foreignkey')
+
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.execute(f"UPDATE {table} SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL")
+            op.create_index(f'ux_{table}_id_created_at', table, ['id', 'created_at'], unique=True, postgresql_concurrently=True, if_not_exists=True)
+            op.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT ck_{table}_legacy_range "
+                f"CHECK (created_at IS NOT NULL AND created_at < '{cutover.isoformat()}') NOT VALID"
+            )
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT ck_{table}_legacy_range")
+
+    bind = op.get_bind()
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    for table in TABLES:
+        legacy = f'{table}_legacy'
+        indexes = [row for row in _index_definitions(bind, table) if row.indexname != f'ux_{table}_id_created_at']
+        foreign_keys = _foreign_keys(bind, table)
+
+        # Free the original names for the partitioned parent
+        op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        op.execute(f"ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey")
+        for row in indexes:
+            op.execute(f"ALTER INDEX {row.indexname} RENAME TO {row.indexname}_legacy")
+        op.execute(f"ALTER TABLE {legacy} ALTER COLUMN created_at SET NOT NULL")
+
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING GENERATED "
+            f"INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE (created_at)"
+        )
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)")
+        for row in foreign_keys:
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {row.conname} {row.definition}")
+        # Definitions were captured before the rename, so they already target the new parent
+        for row in indexes:
+            op.execute(row.indexdef)
+
+        # ATTACH only reuses a constraint-backed index for the parent's primary
+        # key; promoting the prebuilt unique index is catalog-only, whereas
+        # letting ATTACH build one would scan the table under ACCESS EXCLUSIVE
+        op.execute(
+            f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_id_created_at_key "
+            f"UNIQUE USING INDEX ux_{table}_id_created_at"
+        )
+        op.execute(f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO ('{cutover.isoformat()}')")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+        for offset in range(MONTHS_AHEAD):
+            start = _add_months(cutover, offset)
+            end = _add_months(cutover, offset + 1)
+            op.execute(
+                f"CREATE TABLE IF NOT EXISTS {table}_y{start.year:04d}m{start.month:02d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+
+
+def _partitions(bind, table: str) -> List[str]:
+    return bind.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:table AS regclass)"
+    ), {'table': table}).scalars().all()
+
+
+def _stored_columns(bind, table: str) -> List[str]:
+    """Columns of `table` that can be inserted into (generated columns are recomputed)"""
+    return bind.execute(sa.text(
+        "SELECT attname FROM pg_attribute WHERE attrelid = CAST(:table AS regclass) "
+        "AND attnum > 0 AND NOT attisdropped AND attgenerated = '' ORDER BY attnum"
+    ), {'table': table}).scalars().all()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    for table in TABLES:
+        legacy = f'{table}_legacy'
+        if legacy not in _partitions(bind, table):
+            raise RuntimeError(f"{legacy} is no longer a partition of {table}; restore {table} from a pre-upgrade backup")
+
+        # Fold the monthly partitions back into the legacy table. Partitions
+        # already archived by the retention job stay in their export files.
+        op.execute(f"ALTER TABLE {table} DETACH PARTITION {legacy}")
+        op.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT IF EXISTS ck_{table}_legacy_range")
+        columns = ', '.join(_stored_columns(bind, table))
+        op.execute(f"INSERT INTO {legacy} ({columns}) SELECT {columns} FROM {table}")
+
+        # Keep the sequence when the partitioned parent is dropped
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {legacy}.id")
+        op.execute(f"DROP TABLE {table}")
+
+        op.execute(f"ALTER TABLE {legacy} RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {legacy}_id_created_at_key")
+        op.execute(f"DROP INDEX IF EXISTS ux_{table}_id_created_at")
+        for name in bind.execute(sa.text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() "
+            "AND tablename = :table AND indexname LIKE '%\\_legacy'"
+        ), {'table': table}).scalars().all():
+            op.execute(f"ALTER INDEX {name} RENAME TO {name[:-len('_legacy')]}")
+
+        primary_key = bind.execute(sa.text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype = 'p'"
+        ), {'table': table}).scalar_one_or_none()
+        if primary_key is None:
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+        elif primary_key != f'{table}_pkey':
+            op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {primary_key} TO {table}_pkey")
+
+    # Links to threats removed while the FK was gone (e.g. archived partitions)
+    op.execute("DELETE FROM threat_ioc WHERE NOT EXISTS (SELECT 1 FROM threat WHERE threat.id = threat_ioc.threat_id)")
+    op.create_foreign_key('threat_ioc_threat_id_fkey', 'threat_ioc', 'threat', ['threat_id'], ['id'], ondelete='CASCADE')
@@ -0,0 +1,35 @@
+"""Add keyset pagination indexes
+
+Revision ID: 8914f638d4b0
+Revises: 43b8488803d6
+Create Date: 2026-10-17 10:03:17.284906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8914f638d4b0'
+down_revision: Union[str, None] = '43b8488803d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so listings stay writable while the indexes build
+    with op.get_context().autocommit_block():
+        op.create_index('ix_threat_created_at_id', 'threat', ['created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_source_created_at_id', 'source', ['created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_analysis_created_at_id', 'analysis', ['created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_analysis_created_at_id', table_name='analysis', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_source_created_at_id', table_name='source', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_threat_created_at_id', table_name='threat', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,39 @@
+"""Add time-range composite indexes
+
+Revision ID: 90c0e804682d
+Revises: 8914f638d4b0
+Create Date: 2026-10-17 10:48:52.731164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '90c0e804682d'
+down_revision: Union[str, None] = '8914f638d4b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_threat_severity_created_at_id', 'threat', ['severity', 'created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_threat_threat_type_created_at_id', 'threat', ['threat_type', 'created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_threat_created_at_severity_threat_type', 'threat', ['created_at', 'severity', 'threat_type'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_analysis_status_created_at_id', 'analysis', ['status', 'created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+    # Refresh planner statistics so the new indexes are picked up immediately
+    op.execute('ANALYZE threat')
+    op.execute('ANALYZE analysis')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_analysis_status_created_at_id', table_name='analysis', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_threat_created_at_severity_threat_type', table_name='threat', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_threat_threat_type_created_at_id', table_name='threat', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_threat_severity_created_at_id', table_name='threat', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,82 @@
+"""Add ioc reversed_domain key
+
+Revision ID: 98c84cffd319
+Revises: 15e76dae4e62
+Create Date: 2026-10-17 12:06:44.190837
+
+"""
+import re
+from typing import Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '98c84cffd319'
+down_revision: Union[str, None] = '15e76dae4e62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+# Frozen copy of app.services.ioc_service.domain_key at this revision
+HOSTNAME_RE = re.compile(r"^(?=.*[a-z])[a-z0-9_-]+(\.[a-z0-9_-]+)*$")
+
+
+def _domain_key(ioc_type: str, value: str) -> Optional[str]:
+    host = value
+    if ioc_type == "url":
+        try:
+            host = urlsplit(value if "//" in value else f"//{value}").hostname
+        except ValueError:
+            return None
+    elif ioc_type == "email":
+        host = value.rpartition("@")[2]
+    if not host:
+        return None
+    host = host.strip().lower().rstrip(".")
+    if not HOSTNAME_RE.match(host):
+        return None
+    return ".".join(reversed(host.split("."))) + "."
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ioc', sa.Column('reversed_domain', sa.String(length=2048, collation='C'), nullable=True))
+
+    # Fill keys for existing host-bearing IOCs in id order, one batch at a time
+    bind = op.get_bind()
+    ioc = sa.table('ioc', sa.column('id', sa.Integer), sa.column('type', sa.String), sa.column('value', sa.String), sa.column('reversed_domain', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(ioc.c.id, ioc.c.type, ioc.c.value)
+            .where(ioc.c.id > last_id, ioc.c.type.in_(['domain', 'c2_server', 'url', 'email']))
+            .order_by(ioc.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = [
+            {'ioc_id': row.id, 'key': key}
+            for row in rows
+            if (key := _domain_key(row.type, row.value))
+        ]
+        if updates:
+            bind.execute(
+                ioc.update().where(ioc.c.id == sa.bindparam('ioc_id')).values(reversed_domain=sa.bindparam('key')),
+                updates,
+            )
+        last_id = rows[-1].id
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_ioc_reversed_domain', 'ioc', ['reversed_domain'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_ioc_reversed_domain', table_name='ioc', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('ioc', 'reversed_domain')
@@ -0,0 +1,31 @@
+"""Add CANCELLED analysis status
+
+Revision ID: b7e3f1c95a20
+Revises: cef54526222b
+Create Date: 2026-10-17 18:41:27.305918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f1c95a20'
+down_revision: Union[str, None] = 'cef54526222b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A new enum value cannot be used in the transaction that adds it
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE analysisstatus ADD VALUE IF NOT EXISTS 'CANCELLED'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Postgres cannot drop an enum value; cancelled analyses are recorded as failed instead
+    op.execute("UPDATE analysis SET status = 'FAILED', error = coalesce(error, 'Cancelled') WHERE status = 'CANCELLED'")
@@ -0,0 +1,40 @@
+"""Add threat_minhash near-duplicate index
+
+Revision ID: cef54526222b
+Revises: da4a0865a29d
+Create Date: 2026-10-17 16:02:13.554071
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cef54526222b'
+down_revision: Union[str, None] = 'da4a0865a29d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('threat_minhash',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('threat_id', sa.Integer(), nullable=False),
+    sa.Column('signature', sa.LargeBinary(), nullable=False),
+    sa.Column('bands', postgresql.ARRAY(sa.BigInteger()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('threat_id', name='uq_threat_minhash_threat_id')
+    )
+    op.create_index('ix_threat_minhash_bands', 'threat_minhash', ['bands'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_threat_minhash_bands', table_name='threat_minhash', postgresql_using='gin')
+    op.drop_table('threat_minhash')
@@ -0,0 +1,88 @@
+"""Migrate filtered JSON columns to JSONB with GIN indexes
+
+Revision ID: d55f956d8719
+Revises: 15bfe5c96937
+Create Date: 2026-10-17 13:22:05.637420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd55f956d8719'
+down_revision: Union[str, None] = '15bfe5c96937'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+JSONB_COLUMNS = {
+    'threat': ['iocs', 'ttps', 'extra_metadata'],
+    'analysis': ['results'],
+    'source': ['parameters'],
+}
+
+GIN_INDEXES = [
+    ('ix_threat_iocs', 'threat', 'iocs'),
+    ('ix_threat_ttps', 'threat', 'ttps'),
+    ('ix_threat_extra_metadata', 'threat', 'extra_metadata'),
+    ('ix_source_parameters', 'source', 'parameters'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    ALTER COLUMN ... TYPE jsonb would rewrite each table under an exclusive
+    lock. Instead, each column gets a jsonb shadow column kept in sync by a
+    trigger, which is backfilled in small autocommitted batches. The shadow
+    then replaces the original in one short transaction.
+    """
+    for table, columns in JSONB_COLUMNS.items():
+        for column in columns:
+            op.add_column(table, sa.Column(f'{column}__jsonb', postgresql.JSONB(), nullable=True))
+        assignments = ' '.join(f'NEW.{column}__jsonb := NEW.{column}::jsonb;' for column in columns)
+        op.execute(
+            f'CREATE FUNCTION {table}_jsonb_sync() RETURNS trigger AS $$ '
+            f'BEGIN {assignments} RETURN NEW; END $$ LANGUAGE plpgsql'
+        )
+        op.execute(
+            f'CREATE TRIGGER {table}_jsonb_sync BEFORE INSERT OR UPDATE ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION {table}_jsonb_sync()'
+        )
+
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        for table, columns in JSONB_COLUMNS.items():
+            max_id = bind.execute(sa.text(f'SELECT max(id) FROM {table}')).scalar() or 0
+            assignments = ', '.join(f'{column}__jsonb = {column}::jsonb' for column in columns)
+            for low in range(0, max_id, BATCH_SIZE):
+                bind.execute(
+                    sa.text(f'UPDATE {table} SET {assignments} WHERE id > :low AND id <= :high'),
+                    {'low': low, 'high': low + BATCH_SIZE},
+                )
+
+    for table, columns in JSONB_COLUMNS.items():
+        op.execute(f'DROP TRIGGER {table}_jsonb_sync ON {table}')
+        op.execute(f'DROP FUNCTION {table}_jsonb_sync()')
+        for column in columns:
+            op.drop_column(table, column)
+            op.alter_column(table, f'{column}__jsonb', new_column_name=column)
+
+    with op.get_context().autocommit_block():
+        for name, table, column in GIN_INDEXES:
+            op.create_index(name, table, [column], unique=False, postgresql_using='gin', postgresql_ops={column: 'jsonb_path_ops'}, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(GIN_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    for table, columns in JSONB_COLUMNS.items():
+        for column in columns:
+            op.alter_column(table, column, type_=sa.JSON(), postgresql_using=f'{column}::json')
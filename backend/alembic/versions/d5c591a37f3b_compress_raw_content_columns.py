@@ -0,0 +1,121 @@
+"""Store threat raw_content and analysis content zstd-compressed
+
+Revision ID: d5c591a37f3b
+Revises: d55f956d8719
+Create Date: 2026-10-17 14:10:48.902511
+
+"""
+import json
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import zstandard
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5c591a37f3b'
+down_revision: Union[str, None] = 'd55f956d8719'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 2000
+SEARCH_EXCERPT_LENGTH = 10000
+
+# Frozen copy of app.models.threat.THREAT_SEARCH_VECTOR_EXPRESSION at this revision
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(search_excerpt, '')), 'C')"
+)
+PREVIOUS_SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', left(coalesce(raw_content, ''), 10000)), 'C')"
+)
+
+
+def _compact(text: str) -> str:
+    """Drop pretty-print indentation from JSON payloads; leave other text untouched"""
+    try:
+        return json.dumps(json.loads(text), separators=(',', ':'))
+    except ValueError:
+        return text
+
+
+def _backfill(bind, table: str, source: str, compressed: str, excerpt: Optional[str] = None) -> None:
+    compressor = zstandard.ZstdCompressor(level=3)
+    columns = [sa.column('id', sa.Integer), sa.column(source, sa.Text), sa.column(compressed, sa.LargeBinary)]
+    if excerpt:
+        columns.append(sa.column(excerpt, sa.Text))
+    tbl = sa.table(table, *columns)
+    values = {compressed: sa.bindparam('data')}
+    if excerpt:
+        values[excerpt] = sa.bindparam('excerpt')
+    update = tbl.update().where(tbl.c.id == sa.bindparam('row_id')).values(**values)
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(tbl.c.id, tbl.c[source])
+            .where(tbl.c.id > last_id, tbl.c[source].isnot(None))
+            .order_by(tbl.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row_id, text in rows:
+            text = _compact(text)
+            params.append({
+                'row_id': row_id,
+                'data': compressor.compress(text.encode('utf-8')),
+                'excerpt': text[:SEARCH_EXCERPT_LENGTH],
+            })
+        bind.execute(update, params)
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('threat', sa.Column('raw_content_zstd', sa.LargeBinary(), nullable=True))
+    op.add_column('threat', sa.Column('search_excerpt', sa.Text(), nullable=True))
+    op.add_column('analysis', sa.Column('content_zstd', sa.LargeBinary(), nullable=True))
+
+    # Compress existing rows in autocommitted batches so the tables stay writable
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        _backfill(bind, 'threat', 'raw_content', 'raw_content_zstd', excerpt='search_excerpt')
+        _backfill(bind, 'analysis', 'content', 'content_zstd')
+
+    # The search vector now reads the excerpt instead of raw_content
+    op.drop_column('threat', 'search_vector')
+    op.add_column('threat', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True), nullable=True))
+    op.drop_column('threat', 'raw_content')
+    op.drop_column('analysis', 'content')
+    with op.get_context().autocommit_block():
+        op.create_index('ix_threat_search_vector', 'threat', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('threat', sa.Column('raw_content', sa.Text(), nullable=True))
+    op.add_column('analysis', sa.Column('content', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    decompressor = zstandard.ZstdDecompressor()
+    for table, source, target in (('threat', 'raw_content_zstd', 'raw_content'), ('analysis', 'content_zstd', 'content')):
+        tbl = sa.table(table, sa.column('id', sa.Integer), sa.column(source, sa.LargeBinary), sa.column(target, sa.Text))
+        update = tbl.update().where(tbl.c.id == sa.bindparam('row_id')).values(**{target: sa.bindparam('text')})
+        rows = bind.execute(sa.select(tbl.c.id, tbl.c[source]).where(tbl.c[source].isnot(None))).all()
+        params = [{'row_id': row_id, 'text': decompressor.decompress(data).decode('utf-8')} for row_id, data in rows]
+        if params:
+            bind.execute(update, params)
+
+    op.drop_column('threat', 'search_vector')
+    op.add_column('threat', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(PREVIOUS_SEARCH_VECTOR_EXPRESSION, persisted=True), nullable=True))
+    op.create_index('ix_threat_search_vector', 'threat', ['search_vector'], unique=False, postgresql_using='gin')
+    op.drop_column('analysis', 'content_zstd')
+    op.drop_column('threat', 'search_excerpt')
+    op.drop_column('threat', 'raw_content_zstd')
@@ -0,0 +1,46 @@
+"""Add threat fingerprint registry and sightings counter
+
+Revision ID: da4a0865a29d
+Revises: 4499ee200c7e
+Create Date: 2026-10-17 15:27:40.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'da4a0865a29d'
+down_revision: Union[str, None] = '4499ee200c7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Constant defaults: metadata-only on every partition, no table rewrite
+    op.add_column('threat', sa.Column('sightings', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('threat', sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+    op.create_table('threat_fingerprint',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('threat_id', sa.Integer(), nullable=True),
+    sa.Column('threat_created_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fingerprint', name='uq_threat_fingerprint_fingerprint')
+    )
+    op.create_index('ix_threat_fingerprint_threat_id', 'threat_fingerprint', ['threat_id'], unique=False)
+    # Existing threats are registered online by
+    # `python -m app.scripts.backfill_threat_fingerprints` once this migration is applied.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_threat_fingerprint_threat_id', table_name='threat_fingerprint')
+    op.drop_table('threat_fingerprint')
+    op.drop_column('threat', 'last_seen_at')
+    op.drop_column('threat', 'sightings')
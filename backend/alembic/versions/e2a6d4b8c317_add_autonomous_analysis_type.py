@@ -0,0 +1,31 @@
+"""Add AUTONOMOUS analysis type
+
+Revision ID: e2a6d4b8c317
+Revises: b7e3f1c95a20
+Create Date: 2026-10-17 19:41:02.518364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a6d4b8c317'
+down_revision: Union[str, None] = 'b7e3f1c95a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A new enum value cannot be used in the transaction that adds it
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE analysistype ADD VALUE IF NOT EXISTS 'AUTONOMOUS'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Postgres cannot drop an enum value; autonomous results are recorded as full analyses instead
+    op.execute("UPDATE analysis SET analysis_type = 'FULL_ANALYSIS' WHERE analysis_type = 'AUTONOMOUS'")
@@ -103,24 +103,33 @@ async def ensure_tools_assigned(root_agent):
         logging.error(f"[TOOLS] Error assigning tools: {str(e)}")
         raise
 
-collector_parallel_agent = ParallelAgent(
-    name="CollectorFanout",
-    description="Runs all collectors in parallel with discoverer output.",
-    sub_agents=[
-        create_scrape_website_agent(),
-        create_search_news_agent(),
-        create_monitor_social_media_agent()
-    ]
-)
+def create_collector_parallel_agent():
+    return ParallelAgent(
+        name="CollectorFanout",
+        description="Runs all collectors in parallel with discoverer output.",
+        sub_agents=[
+            create_scrape_website_agent(),
+            create_search_news_agent(),
+            create_monitor_social_media_agent()
+        ]
+    )
+
+
+def create_data_collection_pipeline():
+    """
+    A new pipeline with its own sub-agent instances. Agents hold per-run
+    state (assigned tools, parent links), so concurrent runs each need one.
+    """
+    return MCPSequentialAgent(
+        name="DataCollectionPipeline",
+        description="Discovers, collects, and synthesizes web, news, and social media data for threat intelligence.",
+        sub_agents=[
+            create_discoverer_agent(),
+            create_collector_parallel_agent(),
+            create_synthesizer_agent(),
+            create_threat_analysis_agent()
+        ]
+    )
 
-root_agent = MCPSequentialAgent(
-    name="DataCollectionPipeline",
-    description="Discovers, collects, and synthesizes web, news, and social media data for threat intelligence.",
-    sub_agents=[
-        create_discoverer_agent(),
-        collector_parallel_agent,
-        create_synthesizer_agent(),
-        create_threat_analysis_agent()
-    ]
-) 
 
+root_agent = create_data_collection_pipeline()
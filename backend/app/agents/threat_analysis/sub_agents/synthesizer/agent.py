@@ -7,8 +7,8 @@ from google.adk.agents.callback_context import CallbackContext
 from google.genai import types
 from typing import Optional
 from google.adk.models import LlmResponse
+from loguru import logger
 from app.services.threat_utils import store_agent_threat
-from app.db.session import AsyncSessionLocal
 
 MODEL = ADKService().get_litellm_model()
 
@@ -25,22 +25,20 @@ def create_synthesizer_agent():
 
 async def store_synthesized_intel(agent_input):
     """
-    Runs the SynthesizerAgent, extracts synthesized intel, and stores it as a Threat record.
-    Returns the new Threat ID if successful, else None.
+    Queues synthesized intel to be stored as a Threat record by the threat
+    write queue, without waiting for the database.
+    Returns True if it was accepted, else False.
     """
     # agent = create_synthesizer_agent()
     # result = await agent.run(agent_input)
     # synthesized = result.get("synthesized_intel")
     if not agent_input:
-        print("No synthesized intel found in agent output.")
-        return None
-    async with AsyncSessionLocal() as session:
-        threat_id = await store_agent_threat(session, agent_input)
-    if threat_id:
-        print(f"Synthesized threat stored with ID: {threat_id}")
-    else:
-        print("Failed to store synthesized threat.")
-    return threat_id
+        logger.warning("No synthesized intel in agent output; nothing to queue")
+        return False
+    queued = await store_agent_threat(agent_input)
+    if not queued:
+        logger.warning("Synthesized threat was not accepted for storage (rejected or not written)")
+    return queued
 
 
 async def modify_output_after_agent(
@@ -1,12 +1,15 @@
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
 
-from app.api.v1.endpoints import health, threats, sources, analysis, actions, copilot
+from app.api.v1.endpoints import health, threats, sources, analysis, actions, copilot, iocs
 
-api_router = APIRouter()
+# orjson renders large threat/IOC lists several times faster than json.dumps
+api_router = APIRouter(default_response_class=ORJSONResponse)
 
 # Include all endpoint routers
 api_router.include_router(health.router, prefix="/health", tags=["health"])
 api_router.include_router(threats.router, prefix="/threats", tags=["threats"])
+api_router.include_router(iocs.router, prefix="/iocs", tags=["iocs"])
 api_router.include_router(sources.router, prefix="/sources", tags=["sources"])
 api_router.include_router(analysis.router, prefix="/analysis", tags=["analysis"])
 api_router.include_router(actions.router, prefix="/actions", tags=["actions"])
@@ -1,45 +1,181 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.schemas.analysis import Analysis, AnalysisCreate, AnalysisResult
-from app.services.analysis_service import AnalysisService
+from app.core.conditional import conditional_response, request_etag
+from app.core.config import settings
+from app.db.pagination import NEXT_CURSOR_HEADER, InvalidCursorError, next_cursor
+from app.db.projection import InvalidFieldsError, Projection
+from app.db.session import get_db, get_read_db
+from app.models.analysis import Analysis as AnalysisModel, AnalysisStatus
+from app.schemas.analysis import Analysis, AnalysisCreate, AnalysisResult, AutonomousRunRequest
+from app.services.analysis_jobs import JobQueueFullError, analysis_job_pool
+from app.services.analysis_service import AnalysisService, iter_autonomous_threat_intel
 
 router = APIRouter()
 
+# Fields selectable with ?fields= on the analysis result list
+ANALYSIS_FIELDS = Projection(
+    fields=[
+        "id", "analysis_type", "content_id", "content", "status", "results", "extracted_iocs",
+        "extracted_ttps", "risk_score", "model_used", "model_parameters", "error", "created_at", "updated_at",
+    ],
+    readers={"id": lambda analysis: str(analysis.id)},
+    columns={"content": ["content_zstd"]},
+    views={"summary": ["id", "analysis_type", "status", "model_used", "error", "created_at", "updated_at"]},
+)
+
+
+def analysis_to_schema(analysis: AnalysisModel, include_content: bool = False) -> Analysis:
+    """
+    Convert an Analysis row to its API schema. content is deferred and
+    compressed, so it is only read when the caller loaded it and asks for it.
+    """
+    fields = [field for field in ANALYSIS_FIELDS.fields if field != "content"]
+    return Analysis(
+        **ANALYSIS_FIELDS.render(analysis, fields),
+        content=analysis.content if include_content else None,
+    )
+
 
 @router.post("/", response_model=AnalysisResult, status_code=status.HTTP_202_ACCEPTED)
-async def analyze_content(analysis: AnalysisCreate, db: AsyncSession = Depends(get_db)):
-    """Submit content for threat analysis"""
+async def analyze_content(analysis: AnalysisCreate, response: Response, db: AsyncSession = Depends(get_db)):
+    """
+    Submit content for threat analysis. The analysis runs in the background;
+    poll the Location (/analysis/results/{id}) until its status is completed or failed.
+    """
+    if analysis_job_pool.full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many analyses are queued; retry later",
+            headers={"Retry-After": "30"},
+        )
     analysis_service = AnalysisService(db)
-    return await analysis_service.analyze_content(analysis)
+    db_analysis = await analysis_service.submit_analysis(analysis)
+    try:
+        analysis_job_pool.submit(db_analysis.id)
+    except JobQueueFullError as e:
+        await analysis_service.cancel_analysis(db_analysis.id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "30"}
+        )
+    response.headers["Location"] = f"{settings.API_V1_STR}/analysis/results/{db_analysis.id}"
+    return AnalysisResult(
+        analysis_id=str(db_analysis.id),
+        status=AnalysisStatus.PENDING,
+        message="Analysis queued",
+    )
+
+
+@router.post("/results/{analysis_id}/cancel", response_model=AnalysisResult)
+async def cancel_analysis(analysis_id: int, db: AsyncSession = Depends(get_db)):
+    """Cancel a pending or running analysis, freeing its worker"""
+    analysis_service = AnalysisService(db)
+    outcome = await analysis_service.cancel_analysis(analysis_id)
+    if outcome is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Analysis with ID {analysis_id} not found",
+        )
+    if outcome != AnalysisStatus.CANCELLED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Analysis {analysis_id} already finished with status {outcome.value}",
+        )
+    analysis_job_pool.cancel(analysis_id)
+    return AnalysisResult(
+        analysis_id=str(analysis_id),
+        status=AnalysisStatus.CANCELLED,
+        message="Analysis cancelled",
+    )
+
+
+@router.post("/autonomous", response_class=StreamingResponse)
+async def run_autonomous_threat_intel(run: AutonomousRunRequest):
+    """
+    Run the autonomous pipeline for each objective concurrently and stream
+    one NDJSON line per objective as it finishes, carrying its "index" in
+    the request. Disconnecting stops the objectives still running.
+    """
+    async def lines() -> AsyncIterator[bytes]:
+        async for result in iter_autonomous_threat_intel(run.objectives, run.max_concurrency):
+            yield orjson.dumps(result, default=str) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.get("/results", response_model=List[Analysis])
 async def get_analysis_results(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = Query(None, description="Filter by analysis status"),
-    db: AsyncSession = Depends(get_db),
+    since: Optional[datetime] = Query(None, description="Only results created at or after this time (ISO 8601)"),
+    until: Optional[datetime] = Query(None, description="Only results created before this time (ISO 8601)"),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} response header"),
+    include_content: bool = Query(False, description="Also return the analyzed content (large; detail view includes it)"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, or the \"summary\" view; id and created_at are always included"
+    ),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get list of analysis results with optional filtering"""
+    """Get list of analysis results with optional filtering, newest first"""
     analysis_service = AnalysisService(db)
-    return await analysis_service.get_analysis_results(skip=skip, limit=limit, status=status)
+    try:
+        selected = ANALYSIS_FIELDS.parse(fields)
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    last_modified, count = await analysis_service.get_analysis_results_version(status=status, since=since, until=until)
+    not_modified = conditional_response(request, response, request_etag(request, last_modified, count), last_modified)
+    if not_modified:
+        return not_modified
+    try:
+        results = await analysis_service.get_analysis_results(
+            skip=skip,
+            limit=limit,
+            status=status,
+            cursor=cursor,
+            since=since,
+            until=until,
+            include_content=include_content,
+            columns=ANALYSIS_FIELDS.column_names(selected) if selected else None,
+            version=(last_modified, count),
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    next_page = next_cursor(results, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    if selected:
+        # Partial objects would fail the full response model, so they bypass it
+        content = [ANALYSIS_FIELDS.render(analysis, selected) for analysis in results]
+        return ORJSONResponse(content, headers=dict(response.headers))
+    return [analysis_to_schema(analysis, include_content=include_content) for analysis in results]
 
 
 @router.get("/results/{analysis_id}", response_model=Analysis)
-async def get_analysis_result(analysis_id: str, db: AsyncSession = Depends(get_db)):
+async def get_analysis_result(
+    analysis_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)
+):
     """Get a specific analysis result by ID"""
     analysis_service = AnalysisService(db)
-    analysis = await analysis_service.get_analysis_result(analysis_id)
+    updated_at = await analysis_service.get_analysis_result_updated_at(analysis_id)
+    if updated_at is not None:
+        not_modified = conditional_response(request, response, request_etag(request, updated_at), updated_at)
+        if not_modified:
+            return not_modified
+    analysis = await analysis_service.get_analysis_result(analysis_id, updated_at=updated_at)
     if not analysis:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Analysis with ID {analysis_id} not found",
         )
-    return analysis
+    return analysis_to_schema(analysis, include_content=True)
 
 
 @router.post("/extract-iocs")
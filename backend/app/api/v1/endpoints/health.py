@@ -1,7 +1,14 @@
+from typing import Any, Dict
+
 from fastapi import APIRouter, Depends
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.cache import query_cache
+from app.db.session import engine, get_db, get_read_db, pool_stats, read_engine, read_pool_stats
+from app.services.analysis_jobs import analysis_job_pool
+from app.services.source_scheduler import source_scheduler
+from app.services.threat_write_queue import threat_write_queue
 
 router = APIRouter()
 
@@ -12,15 +19,58 @@ async def health_check():
     return {"status": "healthy"}
 
 
-@router.get("/db")
-async def db_health_check(db: AsyncSession = Depends(get_db)):
-    """Database connection health check"""
+async def _probe(db: AsyncSession) -> Dict[str, Any]:
     try:
         # Execute a simple query to check database connection
-        result = await db.execute("SELECT 1")
+        result = await db.execute(text("SELECT 1"))
         if result.scalar() == 1:
             return {"status": "healthy", "database": "connected"}
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
     
     return {"status": "unhealthy", "database": "unknown error"}
+
+
+@router.get("/db")
+async def db_health_check(db: AsyncSession = Depends(get_db)):
+    """Database connection health check (the primary)"""
+    return await _probe(db)
+
+
+@router.get("/db/replica")
+async def db_replica_health_check(db: AsyncSession = Depends(get_read_db)):
+    """Read replica connection health check; probes the primary when DB_READ_REPLICA_URL is not set"""
+    return {**await _probe(db), "replica_configured": read_engine is not engine}
+
+
+@router.get("/db/pool")
+async def db_pool_stats():
+    """Connection pool occupancy, counters and get_db wait time histogram"""
+    stats = pool_stats.snapshot(engine)
+    if read_engine is not engine:
+        stats["replica"] = read_pool_stats.snapshot(read_engine)
+    return stats
+
+
+@router.get("/cache")
+async def query_cache_stats():
+    """Query cache occupancy and hit, miss, eviction and invalidation counters"""
+    return query_cache.snapshot()
+
+
+@router.get("/write-queue")
+async def threat_write_queue_stats():
+    """Depth and counters of the agent pipeline's threat write queue"""
+    return threat_write_queue.snapshot()
+
+
+@router.get("/analysis-jobs")
+async def analysis_job_stats():
+    """Busy workers, queue depth and outcome counters of the analysis job pool"""
+    return analysis_job_pool.snapshot()
+
+
+@router.get("/source-scheduler")
+async def source_scheduler_stats():
+    """Scheduled sources, per-type collection queues and run outcome counters"""
+    return source_scheduler.snapshot()
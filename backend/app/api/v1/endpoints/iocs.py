@@ -0,0 +1,138 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.export import EXPORT_MEDIA_TYPES, encode_export
+from app.db.projection import Projection
+from app.db.session import get_read_db, read_only_session
+from app.schemas.ioc import IOC
+from app.schemas.threat import Threat as ThreatSchema
+from app.services.ioc_service import IOCService
+from app.api.v1.endpoints.threats import threat_to_schema
+
+router = APIRouter()
+
+# Columns of the IOC export
+IOC_FIELDS = Projection(
+    fields=["id", "type", "value", "created_at", "updated_at"],
+    readers={"id": lambda ioc: str(ioc.id)},
+)
+
+
+@router.get("/", response_model=List[IOC])
+async def get_iocs(
+    skip: int = 0,
+    limit: int = 100,
+    type: Optional[str] = Query(None, description="Filter by IOC type (ip, domain, url, hash, ...)"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get list of normalized IOCs with optional filtering"""
+    ioc_service = IOCService(db)
+    return await ioc_service.get_iocs(skip=skip, limit=limit, ioc_type=type)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_iocs(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    type: Optional[str] = Query(None, description="Filter by IOC type (ip, domain, url, hash, ...)"),
+    since: Optional[datetime] = Query(None, description="Only IOCs first seen at or after this time (ISO 8601)"),
+    until: Optional[datetime] = Query(None, description="Only IOCs first seen before this time (ISO 8601)"),
+):
+    """Stream every matching normalized IOC as NDJSON or CSV"""
+    fields = IOC_FIELDS.fields
+
+    async def chunks() -> AsyncIterator[bytes]:
+        # The stream outlives the request's dependencies, so it owns its session
+        async with read_only_session() as db:
+            batches = IOCService(db).stream_iocs(
+                ioc_type=type, since=since, until=until, batch_size=settings.EXPORT_BATCH_SIZE
+            )
+            async for chunk in encode_export(batches, fields, lambda ioc: IOC_FIELDS.render(ioc, fields), export_format):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="iocs.{export_format}"'},
+    )
+
+
+@router.get("/threats", response_model=List[ThreatSchema])
+async def get_threats_for_ioc(
+    value: str = Query(..., description="IOC value to pivot on, e.g. 185.220.101.4"),
+    type: Optional[str] = Query(None, description="IOC type; matches any type when omitted"),
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get the threats that mention a specific IOC"""
+    ioc_service = IOCService(db)
+    threats = await ioc_service.get_threats_for_ioc(value, ioc_type=type, skip=skip, limit=limit)
+    return [threat_to_schema(threat) for threat in threats]
+
+
+@router.get("/domain", response_model=List[IOC])
+async def get_iocs_by_domain(
+    pattern: str = Query(..., description="evil-cdn.net (domain and subdomains) or *.evil-cdn.net (subdomains only)"),
+    type: Optional[str] = Query(None, description="Restrict to one IOC type (domain, url, email, c2_server)"),
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get IOCs whose hostname falls under a domain"""
+    ioc_service = IOCService(db)
+    try:
+        return await ioc_service.get_iocs_by_domain(pattern, skip=skip, limit=limit, ioc_type=type)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/domain/threats", response_model=List[ThreatSchema])
+async def get_threats_by_domain(
+    pattern: str = Query(..., description="evil-cdn.net (domain and subdomains) or *.evil-cdn.net (subdomains only)"),
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get the threats mentioning any IOC under a domain"""
+    ioc_service = IOCService(db)
+    try:
+        threats = await ioc_service.get_threats_by_domain(pattern, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return [threat_to_schema(threat) for threat in threats]
+
+
+@router.get("/ip", response_model=List[IOC])
+async def get_iocs_by_cidr(
+    cidr: str = Query(..., description="Network block, e.g. 45.134.26.0/24; a bare address matches exactly"),
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get IP indicators contained in a network block"""
+    ioc_service = IOCService(db)
+    try:
+        return await ioc_service.get_iocs_by_cidr(cidr, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/ip/threats", response_model=List[ThreatSchema])
+async def get_threats_by_cidr(
+    cidr: str = Query(..., description="Network block, e.g. 45.134.26.0/24; a bare address matches exactly"),
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get the threats mentioning any IP indicator contained in a network block"""
+    ioc_service = IOCService(db)
+    try:
+        threats = await ioc_service.get_threats_by_cidr(cidr, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return [threat_to_schema(threat) for threat in threats]
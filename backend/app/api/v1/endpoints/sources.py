@@ -1,33 +1,95 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.schemas.source import Source, SourceCreate, SourceUpdate
+from app.core.conditional import conditional_response, request_etag
+from app.db.filters import dotted_params
+from app.db.pagination import NEXT_CURSOR_HEADER, InvalidCursorError, next_cursor
+from app.db.projection import Projection
+from app.db.session import get_db, get_read_db
+from app.schemas.base import BulkMutationResult
+from app.schemas.source import Source, SourceBulkUpdate, SourceCreate, SourceFilter, SourceUpdate
+from app.services.source_scheduler import CollectionQueueFullError, source_scheduler
 from app.services.source_service import SourceService
 
 router = APIRouter()
 
+# Fields selectable with ?fields= on the source list; credentials are never returned
+SOURCE_FIELDS = Projection(
+    fields=[
+        "id", "name", "description", "source_type", "url", "enabled", "bright_data_config",
+        "schedule", "parameters", "last_collection_status", "created_at", "updated_at",
+    ],
+    readers={"id": lambda source: str(source.id)},
+    views={"summary": ["id", "name", "source_type", "enabled", "created_at", "updated_at"]},
+)
+
 
 @router.get("/", response_model=List[Source])
 async def get_sources(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     source_type: Optional[str] = Query(None, description="Filter by source type"),
     enabled: Optional[bool] = Query(None, description="Filter by enabled status"),
-    db: AsyncSession = Depends(get_db),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, or the \"summary\" view; id and created_at are always included"
+    ),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} response header"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get list of data sources with optional filtering"""
+    """
+    Get list of data sources with optional filtering, newest first.
+    Collection parameters can be filtered with dotted parameters, e.g. ?parameters.region=eu.
+    """
     source_service = SourceService(db)
-    return await source_service.get_sources(skip=skip, limit=limit, source_type=source_type, enabled=enabled)
+    try:
+        parameters = dotted_params(request.query_params, "parameters")
+        selected = SOURCE_FIELDS.parse(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    last_modified, count = await source_service.get_sources_version(
+        source_type=source_type, enabled=enabled, parameters=parameters
+    )
+    not_modified = conditional_response(request, response, request_etag(request, last_modified, count), last_modified)
+    if not_modified:
+        return not_modified
+    try:
+        sources = await source_service.get_sources(
+            skip=skip,
+            limit=limit,
+            source_type=source_type,
+            enabled=enabled,
+            cursor=cursor,
+            parameters=parameters,
+            columns=SOURCE_FIELDS.column_names(selected) if selected else None,
+            version=(last_modified, count),
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    next_page = next_cursor(sources, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    if selected:
+        # Partial objects would fail the full response model, so they bypass it
+        content = [SOURCE_FIELDS.render(source, selected) for source in sources]
+        return ORJSONResponse(content, headers=dict(response.headers))
+    return sources
 
 
 @router.get("/{source_id}", response_model=Source)
-async def get_source(source_id: str, db: AsyncSession = Depends(get_db)):
+async def get_source(source_id: str, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
     """Get a specific data source by ID"""
     source_service = SourceService(db)
-    source = await source_service.get_source(source_id)
+    updated_at = await source_service.get_source_updated_at(source_id)
+    if updated_at is not None:
+        not_modified = conditional_response(request, response, request_etag(request, updated_at), updated_at)
+        if not_modified:
+            return not_modified
+    source = await source_service.get_source(source_id, updated_at=updated_at)
     if not source:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,8 +105,30 @@ async def create_source(source: SourceCreate, db: AsyncSession = Depends(get_db)
     return await source_service.create_source(source)
 
 
+@router.post("/bulk-update", response_model=BulkMutationResult)
+async def bulk_update_sources(bulk: SourceBulkUpdate, db: AsyncSession = Depends(get_db)):
+    """Update every source matching the filter in one statement and report how many changed"""
+    source_service = SourceService(db)
+    try:
+        affected = await source_service.bulk_update_sources(bulk.filter, bulk.update)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BulkMutationResult(affected=affected)
+
+
+@router.post("/bulk-delete", response_model=BulkMutationResult)
+async def bulk_delete_sources(source_filter: SourceFilter, db: AsyncSession = Depends(get_db)):
+    """Delete every source matching the filter in one statement and report how many were deleted"""
+    source_service = SourceService(db)
+    try:
+        affected = await source_service.bulk_delete_sources(source_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BulkMutationResult(affected=affected)
+
+
 @router.put("/{source_id}", response_model=Source)
-async def update_source(source_id: str, source: SourceUpdate, db: AsyncSession = Depends(get_db)):
+async def update_source(source_id: int, source: SourceUpdate, db: AsyncSession = Depends(get_db)):
     """Update an existing data source"""
     source_service = SourceService(db)
     updated_source = await source_service.update_source(source_id, source)
@@ -57,7 +141,7 @@ async def update_source(source_id: str, source: SourceUpdate, db: AsyncSession =
 
 
 @router.delete("/{source_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_source(source_id: str, db: AsyncSession = Depends(get_db)):
+async def delete_source(source_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a data source"""
     source_service = SourceService(db)
     success = await source_service.delete_source(source_id)
@@ -70,17 +154,28 @@ async def delete_source(source_id: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/{source_id}/trigger", status_code=status.HTTP_202_ACCEPTED)
-async def trigger_source_ingestion(source_id: str, db: AsyncSession = Depends(get_db)):
-    """Manually trigger data ingestion for a specific source"""
+async def trigger_source_ingestion(source_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Queue a collection run for a source on the scheduler's queue for its type.
+    409 if the source is already queued or running, 503 if that queue is full.
+    """
     source_service = SourceService(db)
-    source = await source_service.get_source(source_id)
+    source = await source_service.get_source(str(source_id))
     if not source:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Source with ID {source_id} not found",
         )
-    
-    # Trigger the ingestion process asynchronously
-    # In a real implementation, this would likely use a task queue like Celery
-    # For now, we'll just return a success message
-    return {"status": "ingestion_triggered", "source_id": source_id}
+
+    try:
+        queued = source_scheduler.trigger(source.id, source.source_type)
+    except CollectionQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "60"}
+        )
+    if not queued:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A collection of source {source_id} is already queued or running",
+        )
+    return {"status": "ingestion_triggered", "source_id": str(source_id)}
@@ -1,61 +1,257 @@
-from typing import List, Optional
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.core.conditional import conditional_response, request_etag
+from app.core.config import settings
+from app.db.export import EXPORT_MEDIA_TYPES, encode_export
+from app.db.filters import dotted_params
+from app.db.pagination import NEXT_CURSOR_HEADER, InvalidCursorError, next_cursor
+from app.db.projection import Projection
+from app.db.session import get_db, get_read_db, read_only_session
+from app.schemas.base import BulkMutationResult
 from app.models.threat import Threat as ThreatModel
-from app.schemas.threat import Threat as ThreatSchema, ThreatCreate, ThreatUpdate
+from app.schemas.threat import (
+    Threat as ThreatSchema,
+    ThreatBatchGetRequest,
+    ThreatBatchGetResult,
+    ThreatBulkResult,
+    ThreatBulkUpdate,
+    ThreatCreate,
+    ThreatFilter,
+    ThreatSearchResult,
+    ThreatUpdate,
+)
 from app.services.threat_service import ThreatService
 
 router = APIRouter()
 
+# Fields selectable with ?fields= on the threat list
+THREAT_FIELDS = Projection(
+    fields=[
+        "id", "title", "description", "severity", "threat_type", "confidence_score", "source_id",
+        "source_url", "raw_content", "iocs", "ttps", "metadata", "related_threats", "sightings",
+        "last_seen_at", "created_at", "updated_at",
+    ],
+    readers={
+        "id": lambda threat: str(threat.id),
+        "source_id": lambda threat: str(threat.source_id) if threat.source_id else None,
+        "metadata": lambda threat: threat.extra_metadata if threat.extra_metadata else {},
+        "sightings": lambda threat: threat.sightings or 1,
+    },
+    columns={"raw_content": ["raw_content_zstd"], "metadata": ["extra_metadata"]},
+    views={"summary": ["id", "title", "severity", "threat_type", "created_at", "updated_at"]},
+)
 
-def threat_to_schema(threat: ThreatModel) -> ThreatSchema:
+
+def threat_to_schema(threat: ThreatModel, include_raw_content: bool = False) -> ThreatSchema:
+    """
+    Convert a Threat row to its API schema. raw_content is deferred and
+    compressed, so it is only read when the caller loaded it and asks for it.
+    """
+    fields = [field for field in THREAT_FIELDS.fields if field != "raw_content"]
     return ThreatSchema(
-        id=str(threat.id), 
-        title=threat.title,
-        description=threat.description,
-        severity=threat.severity,
-        threat_type=threat.threat_type,
-        confidence_score=threat.confidence_score,
-        source_id=str(threat.source_id) if threat.source_id else None,
-        source_url=threat.source_url,
-        raw_content=threat.raw_content,
-        iocs=threat.iocs,
-        ttps=threat.ttps,
-        metadata=threat.extra_metadata if threat.extra_metadata else {},
-        related_threats=threat.related_threats,
-        created_at=threat.created_at,
-        updated_at=threat.updated_at,
+        **THREAT_FIELDS.render(threat, fields),
+        raw_content=threat.raw_content if include_raw_content else None,
     )
 
 
 @router.get("/", response_model=List[ThreatSchema])
 async def get_threats(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     severity: Optional[str] = Query(None, description="Filter by severity level"),
     source_type: Optional[str] = Query(None, description="Filter by source type"),
-    db: AsyncSession = Depends(get_db),
+    threat_type: Optional[str] = Query(None, description="Filter by threat type"),
+    since: Optional[datetime] = Query(None, description="Only threats created at or after this time (ISO 8601)"),
+    until: Optional[datetime] = Query(None, description="Only threats created before this time (ISO 8601)"),
+    ttp: Optional[str] = Query(None, description="Filter by MITRE ATT&CK technique ID, e.g. T1566"),
+    ioc: Optional[str] = Query(None, description="Filter by exact IOC value"),
+    include_raw_content: bool = Query(False, description="Also return raw_content (large; detail view includes it)"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, or the \"summary\" view; id and created_at are always included"
+    ),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} response header"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get list of threats with optional filtering"""
+    """
+    Get list of threats with optional filtering, newest first.
+    Metadata can be filtered with dotted parameters, e.g. ?metadata.sector=healthcare.
+    """
     threat_service = ThreatService(db)
-    db_threats = await threat_service.get_threats(skip=skip, limit=limit, severity=severity, source_type=source_type)
-    return [threat_to_schema(threat) for threat in db_threats]
+    try:
+        metadata = dotted_params(request.query_params, "metadata")
+        selected = THREAT_FIELDS.parse(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    last_modified, count = await threat_service.get_threats_version(
+        severity=severity,
+        threat_type=threat_type,
+        since=since,
+        until=until,
+        ttp=ttp,
+        ioc=ioc,
+        metadata=metadata,
+    )
+    not_modified = conditional_response(request, response, request_etag(request, last_modified, count), last_modified)
+    if not_modified:
+        return not_modified
+    try:
+        db_threats = await threat_service.get_threats(
+            skip=skip,
+            limit=limit,
+            severity=severity,
+            source_type=source_type,
+            cursor=cursor,
+            threat_type=threat_type,
+            since=since,
+            until=until,
+            ttp=ttp,
+            ioc=ioc,
+            metadata=metadata,
+            include_raw_content=include_raw_content,
+            columns=THREAT_FIELDS.column_names(selected) if selected else None,
+            version=(last_modified, count),
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    next_page = next_cursor(db_threats, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    if selected:
+        # Partial objects would fail the full response model, so they bypass it
+        content = [THREAT_FIELDS.render(threat, selected) for threat in db_threats]
+        return ORJSONResponse(content, headers=dict(response.headers))
+    return [threat_to_schema(threat, include_raw_content=include_raw_content) for threat in db_threats]
+
+
+@router.get("/search", response_model=List[ThreatSearchResult])
+async def search_threats(
+    q: str = Query(..., min_length=1, description="Search terms; supports \"quoted phrases\", OR and -exclusion"),
+    skip: int = 0,
+    limit: int = Query(20, le=100),
+    severity: Optional[str] = Query(None, description="Filter by severity level"),
+    since: Optional[datetime] = Query(None, description="Only threats created at or after this time (ISO 8601)"),
+    until: Optional[datetime] = Query(None, description="Only threats created before this time (ISO 8601)"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Full-text search over threat title, description and raw content, best match first"""
+    threat_service = ThreatService(db)
+    hits = await threat_service.search_threats(
+        q, skip=skip, limit=limit, severity=severity, since=since, until=until
+    )
+    return [
+        ThreatSearchResult(**threat_to_schema(threat).model_dump(), rank=rank, snippet=snippet)
+        for threat, rank, snippet in hits
+    ]
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_threats(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to export, or the \"summary\" view; defaults to all but raw_content"
+    ),
+    severity: Optional[str] = Query(None, description="Filter by severity level"),
+    threat_type: Optional[str] = Query(None, description="Filter by threat type"),
+    since: Optional[datetime] = Query(None, description="Only threats created at or after this time (ISO 8601)"),
+    until: Optional[datetime] = Query(None, description="Only threats created before this time (ISO 8601)"),
+    ttp: Optional[str] = Query(None, description="Filter by MITRE ATT&CK technique ID, e.g. T1566"),
+    ioc: Optional[str] = Query(None, description="Filter by exact IOC value"),
+):
+    """
+    Stream every matching threat, newest first, as NDJSON or CSV.
+    Supports the list filters, including dotted metadata.* parameters.
+    """
+    try:
+        metadata = dotted_params(request.query_params, "metadata")
+        selected = THREAT_FIELDS.parse(fields) or [field for field in THREAT_FIELDS.fields if field != "raw_content"]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async def chunks() -> AsyncIterator[bytes]:
+        # The stream outlives the request's dependencies, so it owns its session
+        async with read_only_session() as db:
+            batches = ThreatService(db).stream_threats(
+                columns=THREAT_FIELDS.column_names(selected),
+                batch_size=settings.EXPORT_BATCH_SIZE,
+                severity=severity,
+                threat_type=threat_type,
+                since=since,
+                until=until,
+                ttp=ttp,
+                ioc=ioc,
+                metadata=metadata,
+            )
+            async for chunk in encode_export(batches, selected, lambda threat: THREAT_FIELDS.render(threat, selected), export_format):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="threats.{export_format}"'},
+    )
 
 
 @router.get("/{threat_id}", response_model=ThreatSchema)
-async def get_threat(threat_id: int, db: AsyncSession = Depends(get_db)):
+async def get_threat(threat_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
     """Get a specific threat by ID"""
     threat_service = ThreatService(db)
-    threat = await threat_service.get_threat(threat_id)
+    updated_at = await threat_service.get_threat_updated_at(threat_id)
+    if updated_at is not None:
+        not_modified = conditional_response(request, response, request_etag(request, updated_at), updated_at)
+        if not_modified:
+            return not_modified
+    threat = await threat_service.get_threat(threat_id, updated_at=updated_at)
     if not threat:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Threat with ID {threat_id} not found",
         )
-    return threat_to_schema(threat)
+    return threat_to_schema(threat, include_raw_content=True)
+
+
+@router.post("/batch-get", response_model=ThreatBatchGetResult)
+async def batch_get_threats(batch: ThreatBatchGetRequest, db: AsyncSession = Depends(get_read_db)):
+    """
+    Get many threats by ID with one query, in request order.
+    IDs that do not exist are listed under "missing"; duplicates are returned once.
+    """
+    ids = list(dict.fromkeys(batch.ids))
+    if len(ids) > settings.THREAT_BATCH_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.THREAT_BATCH_GET_MAX_IDS} IDs can be fetched per request, got {len(ids)}",
+        )
+    try:
+        selected = THREAT_FIELDS.parse(batch.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    threat_service = ThreatService(db)
+    found = await threat_service.get_threats_by_ids(
+        ids,
+        include_raw_content=batch.include_raw_content,
+        columns=THREAT_FIELDS.column_names(selected) if selected else None,
+    )
+    if selected:
+        threats = [THREAT_FIELDS.render(found[threat_id], selected) for threat_id in ids if threat_id in found]
+    else:
+        threats = [
+            threat_to_schema(found[threat_id], include_raw_content=batch.include_raw_content).model_dump()
+            for threat_id in ids if threat_id in found
+        ]
+    # Rendered directly: re-validating thousands of threats against the response model is the slow part
+    return ORJSONResponse({
+        "threats": threats,
+        "missing": [str(threat_id) for threat_id in ids if threat_id not in found],
+    })
 
 
 @router.post("/", response_model=ThreatSchema, status_code=status.HTTP_201_CREATED)
@@ -66,6 +262,80 @@ async def create_threat(threat: ThreatCreate, db: AsyncSession = Depends(get_db)
     return threat_to_schema(db_threat)
 
 
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def iter_bulk_items(request: Request) -> AsyncIterator[Any]:
+    """
+    Yield raw items from a bulk request body: a JSON array, or NDJSON streamed
+    line by line. Unparseable NDJSON lines are yielded as exceptions so they can
+    be reported per item.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(NDJSON_CONTENT_TYPES):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _parse_ndjson_line(line)
+        if buffer.strip():
+            yield _parse_ndjson_line(buffer)
+        return
+
+    try:
+        items = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON body: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array of threats or an NDJSON body",
+        )
+    for item in items:
+        yield item
+
+
+def _parse_ndjson_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return ValueError(f"Invalid JSON line: {e}")
+
+
+@router.post("/bulk", response_model=ThreatBulkResult)
+async def create_threats_bulk(request: Request, db: AsyncSession = Depends(get_db)):
+    """Bulk-create threats from a JSON array or NDJSON body, reporting per-item errors"""
+    threat_service = ThreatService(db)
+    return await threat_service.create_threats_bulk(iter_bulk_items(request))
+
+
+@router.post("/bulk-update", response_model=BulkMutationResult)
+async def bulk_update_threats(bulk: ThreatBulkUpdate, db: AsyncSession = Depends(get_db)):
+    """
+    Update every threat matching the filter in one statement, e.g. re-rate all
+    threats of a campaign, and report how many changed. Metadata is merged.
+    """
+    threat_service = ThreatService(db)
+    try:
+        affected = await threat_service.bulk_update_threats(bulk.filter, bulk.update)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BulkMutationResult(affected=affected)
+
+
+@router.post("/bulk-delete", response_model=BulkMutationResult)
+async def bulk_delete_threats(threat_filter: ThreatFilter, db: AsyncSession = Depends(get_db)):
+    """Delete every threat matching the filter in one statement and report how many were deleted"""
+    threat_service = ThreatService(db)
+    try:
+        affected = await threat_service.bulk_delete_threats(threat_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BulkMutationResult(affected=affected)
+
+
 @router.put("/{threat_id}", response_model=ThreatSchema)
 async def update_threat(threat_id: int, threat: ThreatUpdate, db: AsyncSession = Depends(get_db)):
     """Update an existing threat"""
@@ -80,7 +350,7 @@ async def update_threat(threat_id: int, threat: ThreatUpdate, db: AsyncSession =
 
 
 @router.delete("/{threat_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_threat(threat_id: str, db: AsyncSession = Depends(get_db)):
+async def delete_threat(threat_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a threat"""
     threat_service = ThreatService(db)
     success = await threat_service.delete_threat(threat_id)
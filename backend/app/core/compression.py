@@ -0,0 +1,169 @@
+"""
+Response compression negotiated from Accept-Encoding: zstd, brotli or gzip.
+
+Bodies smaller than the threshold are sent as-is. Streaming responses (exports,
+NDJSON) are compressed chunk by chunk rather than buffered.
+"""
+import gzip
+import zlib
+from typing import Dict, List, Optional
+
+import brotli
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Server preference when the client accepts several encodings equally
+SUPPORTED_ENCODINGS = ("zstd", "br", "gzip")
+
+# Fast levels: API payloads are compressed on every request
+ZSTD_LEVEL = 3
+BROTLI_QUALITY = 4
+GZIP_LEVEL = 6
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header, if any"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    wildcard = weights.get("*", 0.0)
+    candidates = [
+        (weights.get(encoding, wildcard), -rank, encoding)
+        for rank, encoding in enumerate(SUPPORTED_ENCODINGS)
+    ]
+    weight, _, encoding = max(candidates)
+    return encoding if weight > 0 else None
+
+
+class _Compressor:
+    """Incremental compressor with a common interface across encodings"""
+
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self._encoding = encoding
+
+    def compress(self, data: bytes) -> bytes:
+        if self._encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything buffered so far, so each streamed chunk reaches the client"""
+        if self._encoding == "br":
+            return self._obj.flush()
+        if self._encoding == "zstd":
+            return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress_body(encoding: str, body: bytes) -> bytes:
+    """One-shot compression of a complete body"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing HTTP responses of at least `minimum_size` bytes"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether to compress
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = "content-encoding" in headers
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            await self._send_start()
+            await self.send(message)
+            return
+
+        if self.compressor is None and not more_body:
+            # Complete body in one message
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if len(body) >= self.minimum_size:
+                body = compress_body(self.encoding, body)
+                headers["Content-Encoding"] = self.encoding
+                headers["Content-Length"] = str(len(body))
+            await self._send_start()
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        if self.compressor is None:
+            # Streaming body: compress incrementally, length is unknown up front
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            headers["Content-Encoding"] = self.encoding
+            del headers["Content-Length"]
+            self.compressor = _Compressor(self.encoding)
+            await self._send_start()
+
+        chunks: List[bytes] = [self.compressor.compress(body)]
+        chunks.append(self.compressor.flush() if more_body else self.compressor.finish())
+        await self.send({"type": "http.response.body", "body": b"".join(chunks), "more_body": more_body})
+
+    async def _send_start(self) -> None:
+        if self.start_message is not None:
+            await self.send(self.start_message)
+            self.start_message = None
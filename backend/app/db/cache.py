@@ -0,0 +1,173 @@
+"""
+In-process read cache for the list and detail queries behind the dashboard.
+
+Entries are grouped by namespace (e.g. "threats" for list pages, "threat" for
+rows by ID) and keyed by the normalized query parameters. They expire after a
+TTL and the least recently used are evicted past the size bound. Services
+invalidate the namespaces and IDs a write touches once it has committed.
+
+The cache is per process: a write in one worker does not reach the others,
+and reads may come from a lagging replica, so the TTL bounds how stale a page
+can be. Endpoints with conditional GET check freshness with an uncached
+version query and key pages (or recheck rows) by it. Cached ORM rows are detached from their session and shared between
+requests; callers must treat them as read-only.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+# Returned by QueryCache.get when there is no live entry; None is a cacheable value
+MISSING = object()
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def cache_key(*args: Any, **params: Any) -> Hashable:
+    """
+    Normalized key for a query: positional parts plus keyword parameters in
+    sorted order, with None-valued parameters dropped so an omitted filter and
+    an explicit None share an entry.
+    """
+    named = tuple(sorted((name, _freeze(value)) for name, value in params.items() if value is not None))
+    return tuple(_freeze(arg) for arg in args) + named
+
+
+def detach(session: AsyncSession, rows: Iterable[Any]) -> None:
+    """
+    Expunge loaded rows so they survive the session's rollback and close.
+    Attributes that were not loaded stay unavailable.
+    """
+    for row in rows:
+        if row is not None:
+            session.expunge(row)
+
+
+class QueryCache:
+    """Thread-safe TTL + LRU cache with per-namespace invalidation and hit/miss counters"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        # Bumped on every invalidation; a load that started before one is not stored
+        self._generations: Dict[str, int] = {}
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def generation(self, namespace: str) -> int:
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def get(self, namespace: str, key: Hashable) -> Any:
+        """The live value for key, or MISSING"""
+        if not self.enabled:
+            return MISSING
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[(namespace, key)]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return value
+
+    def set(self, namespace: str, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store a value. With `generation` (read before loading it), the value
+        is dropped if the namespace was invalidated in the meantime.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generations.get(namespace, 0):
+                return
+            self._entries[(namespace, key)] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def get_or_load(self, namespace: str, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for key, loading and storing it on a miss"""
+        value = self.get(namespace, key)
+        if value is not MISSING:
+            return value
+        generation = self.generation(namespace)
+        value = await load()
+        self.set(namespace, key, value, generation=generation)
+        return value
+
+    def invalidate(self, namespace: str, *keys: Hashable) -> None:
+        """Drop the given keys of a namespace, or the whole namespace when none are given"""
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            if keys:
+                targets = [(namespace, key) for key in keys if (namespace, key) in self._entries]
+            else:
+                targets = [entry for entry in self._entries if entry[0] == namespace]
+            for target in targets:
+                del self._entries[target]
+            self.invalidations += len(targets)
+
+    def clear(self) -> None:
+        with self._lock:
+            for namespace in {entry[0] for entry in self._entries}:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Configuration, occupancy per namespace and cumulative counters"""
+        with self._lock:
+            namespaces: Dict[str, int] = {}
+            for namespace, _ in self._entries:
+                namespaces[namespace] = namespaces.get(namespace, 0) + 1
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "entries": len(self._entries),
+                "namespaces": namespaces,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared by the services; stats are surfaced at /api/v1/health/cache
+query_cache = QueryCache(settings.QUERY_CACHE_MAX_ENTRIES, settings.QUERY_CACHE_TTL_SECONDS)
@@ -0,0 +1,20 @@
+from typing import Optional
+
+import zstandard
+
+# Level 3 is zstd's default: fast enough for the ingest path, far smaller than plain text
+ZSTD_LEVEL = 3
+
+
+def compress_text(text: Optional[str]) -> Optional[bytes]:
+    """Compress text with zstd for storage in a bytea column"""
+    if text is None:
+        return None
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(text.encode("utf-8"))
+
+
+def decompress_text(data: Optional[bytes]) -> Optional[str]:
+    """Inverse of compress_text"""
+    if data is None:
+        return None
+    return zstandard.ZstdDecompressor().decompress(bytes(data)).decode("utf-8")
@@ -0,0 +1,53 @@
+import csv
+import enum
+import io
+from datetime import date
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, List, Sequence
+
+import orjson
+
+# Export formats and their response media types
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _csv_cell(value: Any) -> Any:
+    """Flatten a value for a CSV cell; nested lists/objects become JSON"""
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode("utf-8")
+    return value
+
+
+async def encode_export(
+    batches: AsyncIterable[List[Any]],
+    fields: Sequence[str],
+    render: Callable[[Any], Dict[str, Any]],
+    export_format: str,
+) -> AsyncIterator[bytes]:
+    """
+    Encode batches of rows as NDJSON or CSV, one chunk per batch, so the first
+    bytes go out as soon as the first batch is fetched.
+    """
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue().encode("utf-8")
+        async for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            for row in batch:
+                values = render(row)
+                writer.writerow([_csv_cell(values[field]) for field in fields])
+            yield buffer.getvalue().encode("utf-8")
+    else:
+        async for batch in batches:
+            yield b"".join(orjson.dumps(render(row), option=orjson.OPT_APPEND_NEWLINE) for row in batch)
@@ -0,0 +1,70 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+from sqlalchemy import ARRAY, Integer, Select, any_, literal
+
+
+def to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert a datetime to naive UTC, matching how created_at/updated_at are stored"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def apply_time_range(
+    query: Select,
+    column: Any,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Select:
+    """Restrict a query to since <= column < until"""
+    if since is not None:
+        query = query.where(column >= to_utc_naive(since))
+    if until is not None:
+        query = query.where(column < to_utc_naive(until))
+    return query
+
+
+def dotted_params(query_params: Mapping[str, str], prefix: str) -> Optional[Dict[str, Any]]:
+    """
+    Collect `prefix.key=value` query parameters into a nested document for
+    JSONB containment, e.g. metadata.impact_assessment.scope=global ->
+    {"impact_assessment": {"scope": "global"}}. Numbers, booleans and null are
+    parsed as JSON; anything else is matched as a string.
+    """
+    document: Dict[str, Any] = {}
+    for name, raw in query_params.items():
+        if not name.startswith(f"{prefix}."):
+            continue
+        path = name[len(prefix) + 1:].split(".")
+        if not all(path):
+            raise ValueError(f"Invalid filter parameter: {name!r}")
+        try:
+            value = json.loads(raw)
+            if isinstance(value, (dict, list, str)):
+                value = raw
+        except json.JSONDecodeError:
+            value = raw
+        target = document
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+            if not isinstance(target, dict):
+                raise ValueError(f"Conflicting filter parameter: {name!r}")
+        target[path[-1]] = value
+    return document or None
+
+
+def apply_containment(query: Select, column: Any, document: Optional[Any]) -> Select:
+    """Restrict a query to rows whose JSONB column contains `document` (@>, GIN-indexable)"""
+    if document:
+        query = query.where(column.contains(document))
+    return query
+
+
+def any_of(column: Any, values: Sequence[Any], item_type: Any = Integer) -> Any:
+    """
+    column = ANY(:values), with the values bound as one array parameter so
+    the statement text (and its plan) is the same however many are given.
+    """
+    return column == any_(literal(list(values), ARRAY(item_type)))
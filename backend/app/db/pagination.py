@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, tuple_
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    """Encode a (created_at, id) keyset position as an opaque URL-safe token"""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any]:
+    """Decode a token produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid pagination cursor: {cursor!r}") from e
+
+
+def paginate(query: Select, model: Any, cursor: Optional[str], limit: int, skip: int = 0) -> Select:
+    """
+    Order a query newest-first and restrict it to the page after `cursor`.
+    The (created_at, id) row comparison is served by the model's composite index,
+    so every page costs the same regardless of depth. `skip` is only honoured
+    without a cursor, for clients still paging by offset.
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    elif skip:
+        query = query.offset(skip)
+    return query
+
+
+def next_cursor(items: Sequence[Any], limit: int) -> Optional[str]:
+    """Return the cursor of the page after `items`, or None on the last page"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
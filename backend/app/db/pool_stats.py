@@ -0,0 +1,102 @@
+"""
+Connection pool telemetry.
+
+Counts pool events on the engine and records how long requests wait to get a
+connection in get_db, so pool saturation between the API and the pipeline is
+visible at /api/v1/health/db/pool.
+"""
+import bisect
+import threading
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Upper bounds (milliseconds) of the connection wait time histogram buckets
+WAIT_TIME_BUCKETS_MS: List[float] = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class PoolStats:
+    """Thread-safe counters and wait time histogram for one engine's pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+        # One slot per bucket plus a final +Inf slot
+        self.wait_buckets = [0] * (len(WAIT_TIME_BUCKETS_MS) + 1)
+
+    def attach(self, engine: AsyncEngine) -> None:
+        """Register pool event listeners on an async engine"""
+        pool = engine.sync_engine.pool
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, *args: Any) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *args: Any) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, *args: Any) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, *args: Any) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, wait_ms: float) -> None:
+        """Record the time a caller waited to acquire a connection"""
+        with self._lock:
+            self.wait_count += 1
+            self.wait_sum_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            self.wait_buckets[bisect.bisect_left(WAIT_TIME_BUCKETS_MS, wait_ms)] += 1
+
+    def record_timeout(self) -> None:
+        """Record a caller that gave up waiting for a connection"""
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, engine: AsyncEngine) -> Dict[str, Any]:
+        """Current pool occupancy plus cumulative counters"""
+        pool = engine.sync_engine.pool
+        occupancy: Dict[str, Any] = {"status": pool.status()}
+        # QueuePool exposes occupancy; NullPool/StaticPool do not
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            getter = getattr(pool, name, None)
+            if callable(getter):
+                occupancy[name] = getter()
+
+        with self._lock:
+            cumulative = 0
+            histogram = {}
+            for bound, count in zip(WAIT_TIME_BUCKETS_MS + [float("inf")], self.wait_buckets):
+                cumulative += count
+                histogram["+Inf" if bound == float("inf") else f"le_{bound:g}ms"] = cumulative
+            return {
+                "pool": occupancy,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_time_ms": {
+                    "count": self.wait_count,
+                    "sum": round(self.wait_sum_ms, 3),
+                    "max": round(self.wait_max_ms, 3),
+                    "avg": round(self.wait_sum_ms / self.wait_count, 3) if self.wait_count else 0.0,
+                    "histogram": histogram,
+                },
+            }
@@ -0,0 +1,77 @@
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from sqlalchemy.orm import load_only
+
+# Always returned: the keyset cursor of the next page is built from them
+KEY_FIELDS = ("id", "created_at")
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when ?fields= names an unknown field or view"""
+
+
+class Projection:
+    """
+    Sparse fieldsets for one list endpoint. Each API field is read from the
+    model attribute of the same name unless a reader is given, and is loaded
+    from the column of the same name unless `columns` says otherwise.
+    Named views (e.g. "summary") expand to a fixed list of fields.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        readers: Optional[Mapping[str, Callable[[Any], Any]]] = None,
+        columns: Optional[Mapping[str, Sequence[str]]] = None,
+        views: Optional[Mapping[str, Sequence[str]]] = None,
+    ):
+        self.fields = list(fields)
+        self.readers = {name: attrgetter(name) for name in self.fields}
+        self.readers.update(readers or {})
+        self.columns = dict(columns or {})
+        self.views = dict(views or {})
+
+    def parse(self, fields: Optional[str]) -> Optional[List[str]]:
+        """
+        Resolve a comma-separated ?fields= value into field names.
+        None means the full representation.
+        """
+        if not fields or not fields.strip():
+            return None
+        selected = list(KEY_FIELDS)
+        for name in (part.strip() for part in fields.split(",")):
+            if not name:
+                continue
+            if name in self.views:
+                expanded = self.views[name]
+            elif name in self.readers:
+                expanded = [name]
+            else:
+                raise InvalidFieldsError(
+                    f"Unknown field {name!r}; expected any of {sorted(self.readers)} "
+                    f"or a view: {sorted(self.views)}"
+                )
+            selected.extend(field for field in expanded if field not in selected)
+        return selected
+
+    def column_names(self, selected: Iterable[str]) -> List[str]:
+        """Model attributes to load for the selected fields"""
+        names: List[str] = []
+        for field in selected:
+            for column in self.columns.get(field, (field,)):
+                if column not in names:
+                    names.append(column)
+        return names
+
+    def render(self, row: Any, selected: Iterable[str]) -> Dict[str, Any]:
+        """The selected fields of a row, converted for the response"""
+        return {field: self.readers[field](row) for field in selected}
+
+
+def load_columns(model: Any, columns: Sequence[str]) -> Any:
+    """
+    Loader option restricting the SELECT to `columns`. Other attributes raise
+    on access instead of lazy loading, which async sessions cannot do.
+    """
+    return load_only(*(getattr(model, column) for column in columns), raiseload=True)
@@ -1,22 +1,58 @@
-from typing import AsyncGenerator
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool_stats import PoolStats
 
-# Create async engine for PostgreSQL
-engine = create_async_engine(settings.db_url, echo=True)
+# Create async engine for PostgreSQL, sized by the configured pool profile
+engine = create_async_engine(settings.db_url, **settings.db_engine_options)
+
+# Pool telemetry, surfaced at /api/v1/health/db/pool
+pool_stats = PoolStats()
+pool_stats.attach(engine)
+
+# Read-only traffic goes to the replica when one is configured, otherwise it
+# shares the primary engine (and its pool) with read-write sessions
+if settings.db_read_url != settings.db_url:
+    read_engine = create_async_engine(settings.db_read_url, **settings.db_engine_options)
+    read_pool_stats = PoolStats()
+    read_pool_stats.attach(read_engine)
+else:
+    read_engine = engine
+    read_pool_stats = pool_stats
 
 # Create async session factory
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False
 )
 
+AsyncReadSessionLocal = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False
+)
+
+
+async def _acquire_connection(session: AsyncSession, stats: PoolStats) -> None:
+    # Acquire the connection up front so time spent queueing on the pool is measured
+    started = time.perf_counter()
+    try:
+        await session.connection()
+    except PoolTimeoutError:
+        stats.record_timeout()
+        raise
+    stats.record_wait((time.perf_counter() - started) * 1000)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting async DB session"""
     async with AsyncSessionLocal() as session:
+        await _acquire_connection(session, pool_stats)
+
         try:
             yield session
             await session.commit()
@@ -25,3 +61,27 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
         finally:
             await session.close()
+
+
+@asynccontextmanager
+async def read_only_session() -> AsyncIterator[AsyncSession]:
+    """
+    A read-only transaction, on the replica when DB_READ_REPLICA_URL is set.
+    It is always rolled back, never committed, and may trail the primary by
+    the replica's replication lag.
+    """
+    async with AsyncReadSessionLocal() as session:
+        await _acquire_connection(session, read_pool_stats)
+
+        try:
+            await session.execute(text("SET TRANSACTION READ ONLY"))
+            yield session
+        finally:
+            await session.rollback()
+            await session.close()
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for GET endpoints: see read_only_session"""
+    async with read_only_session() as session:
+        yield session
@@ -1,9 +1,17 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
 from app.api.v1.api import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.db.pagination import NEXT_CURSOR_HEADER
+from app.services.analysis_jobs import analysis_job_pool
+from app.services.partition_service import run_partition_maintenance
+from app.services.source_scheduler import source_scheduler
+from app.services.threat_write_queue import threat_write_queue
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -21,8 +29,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
 )
 
+# Negotiated zstd/brotli/gzip compression for responses above the threshold
+app.add_middleware(CompressionMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -36,8 +48,20 @@ async def root():
 @app.on_event("startup")
 async def startup_event():
     logger.info(f"Starting {settings.PROJECT_NAME} API")
+    # Keep monthly partitions created ahead of inserts and archive expired ones
+    app.state.partition_maintenance = asyncio.create_task(run_partition_maintenance())
+    # Batch the agent pipeline's threat writes off the callback path
+    threat_write_queue.start()
+    # Run submitted analyses on a bounded worker pool instead of in the request
+    await analysis_job_pool.start()
+    # Collect from sources on their cron schedules; manual triggers share its queues
+    source_scheduler.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info(f"Shutting down {settings.PROJECT_NAME} API")
+    app.state.partition_maintenance.cancel()
+    await source_scheduler.stop()
+    await analysis_job_pool.stop()
+    await threat_write_queue.stop(settings.THREAT_WRITE_DRAIN_TIMEOUT_SECONDS)
@@ -1,8 +1,13 @@
-from sqlalchemy import Column, String, Text, JSON, Enum, ForeignKey
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, String, Text, JSON, Enum, ForeignKey, Index, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship, Mapped, mapped_column, deferred
 import enum
 
 from app.db.base_class import Base
+from app.db.compression import compress_text, decompress_text
 
 
 class AnalysisStatus(str, enum.Enum):
@@ -11,6 +16,7 @@ class AnalysisStatus(str, enum.Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class AnalysisType(str, enum.Enum):
@@ -20,18 +26,22 @@ class AnalysisType(str, enum.Enum):
     ENTITY_RECOGNITION = "entity_recognition"
     SENTIMENT_ANALYSIS = "sentiment_analysis"
     FULL_ANALYSIS = "full_analysis"
+    AUTONOMOUS = "autonomous"
 
 
 class Analysis(Base):
-    """Model for AI analysis results"""
+    """Model for AI analysis results, range-partitioned by month on created_at"""
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # Part of the primary key because Postgres requires the partition key in it
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, primary_key=True)
     content_id = Column(String, nullable=True)  # Optional reference to original content
-    content = Column(Text, nullable=True)  # Raw content that was analyzed
+    # Raw content that was analyzed, zstd-compressed and deferred; use the content property
+    content_zstd = deferred(Column(LargeBinary, nullable=True))
     analysis_type = Column(Enum(AnalysisType), nullable=False, default=AnalysisType.FULL_ANALYSIS)
     status = Column(Enum(AnalysisStatus), nullable=False, default=AnalysisStatus.PENDING, index=True)
     
     # Analysis results
-    results = Column(JSON, nullable=True)
+    results = Column(JSONB, nullable=True)
     
     # Extracted entities
     extracted_iocs = Column(JSON, nullable=True)
@@ -46,3 +56,20 @@ class Analysis(Base):
     
     # Error information (if failed)
     error = Column(Text, nullable=True)
+
+    @property
+    def content(self) -> Optional[str]:
+        return decompress_text(self.content_zstd)
+
+    @content.setter
+    def content(self, text: Optional[str]) -> None:
+        self.content_zstd = compress_text(text)
+
+    __table_args__ = (
+        # Keyset pagination (newest first)
+        Index("ix_analysis_created_at_id", "created_at", "id"),
+        # Status listings within a time range
+        Index("ix_analysis_status_created_at_id", "status", "created_at", "id"),
+        # Monthly partitions are managed by app.services.partition_service
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, String, Float, ForeignKey, Integer, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import INET
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class IOC(Base):
+    """Model for a normalized Indicator of Compromise shared across threats"""
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    type = Column(String(50), nullable=False)
+    value = Column(String(2048), nullable=False)
+    # Host labels in reverse order with a trailing dot ("www.evil-cdn.net" ->
+    # "net.evil-cdn.www."), so suffix/subdomain queries become prefix range scans.
+    # "C" collation keeps btree order byte-wise for those ranges.
+    reversed_domain = Column(String(2048, collation="C"), nullable=True)
+    # IP/network indicators as inet, so CIDR containment pivots use the GiST index
+    ip_address = Column(INET, nullable=True)
+
+    __table_args__ = (
+        # Pivot lookups ("which threats mention X?") resolve through this index
+        UniqueConstraint("type", "value", name="uq_ioc_type_value"),
+        # Untyped lookups by value alone
+        Index("ix_ioc_value", "value"),
+        Index("ix_ioc_reversed_domain", "reversed_domain"),
+        Index("ix_ioc_ip_address", "ip_address", postgresql_using="gist", postgresql_ops={"ip_address": "inet_ops"}),
+    )
+
+
+class ThreatIOC(Base):
+    """Link table between threats and the IOCs they mention"""
+    __tablename__ = "threat_ioc"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # No foreign key: threat is partitioned, so links are removed by ThreatService
+    # and by the partition retention job instead of ON DELETE CASCADE
+    threat_id = Column(Integer, nullable=False)
+    ioc_id = Column(Integer, ForeignKey("ioc.id", ondelete="CASCADE"), nullable=False)
+    confidence = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("threat_id", "ioc_id", name="uq_threat_ioc_threat_id_ioc_id"),
+        Index("ix_threat_ioc_ioc_id_threat_id", "ioc_id", "threat_id"),
+    )
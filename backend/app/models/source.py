@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Text, Boolean, JSON, Enum, Integer
+from sqlalchemy import Column, String, Text, Boolean, JSON, Enum, Integer, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 import enum
 
@@ -32,7 +33,7 @@ class Source(Base):
     schedule = Column(String(100), nullable=True)
     
     # Collection parameters
-    parameters = Column(JSON, nullable=True)
+    parameters = Column(JSONB, nullable=True)
     
     # Authentication credentials (encrypted)
     credentials = Column(JSON, nullable=True)
@@ -42,3 +43,10 @@ class Source(Base):
     
     # Last collection timestamp and status
     last_collection_status = Column(JSON, nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination (newest first)
+        Index("ix_source_created_at_id", "created_at", "id"),
+        # Containment (@>) filters on collection parameters
+        Index("ix_source_parameters", "parameters", postgresql_using="gin", postgresql_ops={"parameters": "jsonb_path_ops"}),
+    )
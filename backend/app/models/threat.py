@@ -1,11 +1,29 @@
-from sqlalchemy import Column, String, Text, Float, JSON, ForeignKey, Enum, Integer
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, DateTime, String, Text, Float, JSON, ForeignKey, Enum, Integer, Index, Computed, LargeBinary, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY, BIGINT, JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, Mapped, mapped_column, deferred
 import enum
 
 from app.db.base_class import Base
+from app.db.compression import compress_text, decompress_text
 from app.models.source import Source  # Ensure Source is imported before Threat is defined
 
 
+# Text search configuration used by the generated search vector and its queries
+THREAT_SEARCH_CONFIG = "english"
+
+# Only this many leading characters of raw_content are kept uncompressed for search
+THREAT_SEARCH_RAW_CONTENT_PREFIX = 10000
+
+THREAT_SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{THREAT_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{THREAT_SEARCH_CONFIG}', coalesce(description, '')), 'B') || "
+    f"setweight(to_tsvector('{THREAT_SEARCH_CONFIG}', coalesce(search_excerpt, '')), 'C')"
+)
+
+
 class SeverityLevel(str, enum.Enum):
     """Enumeration for threat severity levels"""
     LOW = "low"
@@ -25,8 +43,10 @@ class ThreatType(str, enum.Enum):
 
 
 class Threat(Base):
-    """Model for threat intelligence data"""
+    """Model for threat intelligence data, range-partitioned by month on created_at"""
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # Part of the primary key because Postgres requires the partition key in it
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, primary_key=True)
     source_id = Column(Integer, ForeignKey("source.id"), nullable=True)
     title = Column(String(255), nullable=False, index=True)
     description = Column(Text, nullable=True)
@@ -35,15 +55,105 @@ class Threat(Base):
     confidence_score = Column(Float, nullable=False, default=0.0)
     source = relationship("app.models.source.Source", back_populates="threats")
     source_url = Column(String(1024), nullable=True)
-    raw_content = Column(Text, nullable=True)
+    # Raw content is stored zstd-compressed and deferred: only detail reads load it.
+    # Use the raw_content property to read or write the text.
+    raw_content_zstd = deferred(Column(LargeBinary, nullable=True))
+    # Uncompressed leading slice of raw_content feeding the search vector
+    search_excerpt = deferred(Column(Text, nullable=True))
     # Indicators of Compromise (IOCs)
-    iocs = Column(JSON, nullable=True, default=list)
+    iocs = Column(JSONB, nullable=True, default=list)
     
     # Tactics, Techniques, and Procedures (TTPs)
-    ttps = Column(JSON, nullable=True, default=list)
+    ttps = Column(JSONB, nullable=True, default=list)
     
     # Additional metadata
-    extra_metadata: Mapped[dict] = mapped_column(JSON, nullable=True, default=dict)
+    extra_metadata: Mapped[dict] = mapped_column(JSONB, nullable=True, default=dict)
     
     # Relations to other threats
     related_threats = Column(JSON, nullable=True, default=list)
+
+    # How many times the pipeline re-synthesized this threat, and when it last did
+    sightings = Column(Integer, nullable=False, default=1, server_default="1")
+    last_seen_at = Column(DateTime, nullable=True)
+
+    # Full-text search vector, maintained by Postgres; deferred so listings never load it
+    search_vector = deferred(Column(TSVECTOR, Computed(THREAT_SEARCH_VECTOR_EXPRESSION, persisted=True)))
+
+    @staticmethod
+    def raw_content_values(text: Optional[str]) -> Dict[str, Any]:
+        """Column values storing `text` as raw content"""
+        return {
+            "raw_content_zstd": compress_text(text),
+            "search_excerpt": text[:THREAT_SEARCH_RAW_CONTENT_PREFIX] if text else None,
+        }
+
+    @property
+    def raw_content(self) -> Optional[str]:
+        return decompress_text(self.raw_content_zstd)
+
+    @raw_content.setter
+    def raw_content(self, text: Optional[str]) -> None:
+        for key, value in self.raw_content_values(text).items():
+            setattr(self, key, value)
+
+    __table_args__ = (
+        # Keyset pagination (newest first)
+        Index("ix_threat_created_at_id", "created_at", "id"),
+        # Dashboard time-range queries: "critical threats in the last 24h" and
+        # per-type listings seek on the equality column, then range-scan created_at
+        Index("ix_threat_severity_created_at_id", "severity", "created_at", "id"),
+        Index("ix_threat_threat_type_created_at_id", "threat_type", "created_at", "id"),
+        # Time-range-first aggregations (counts by severity/type) stay index-only
+        Index("ix_threat_created_at_severity_threat_type", "created_at", "severity", "threat_type"),
+        Index("ix_threat_search_vector", "search_vector", postgresql_using="gin"),
+        # Containment (@>) filters on IOCs, TTPs and metadata
+        Index("ix_threat_iocs", "iocs", postgresql_using="gin", postgresql_ops={"iocs": "jsonb_path_ops"}),
+        Index("ix_threat_ttps", "ttps", postgresql_using="gin", postgresql_ops={"ttps": "jsonb_path_ops"}),
+        Index(
+            "ix_threat_extra_metadata",
+            "extra_metadata",
+            postgresql_using="gin",
+            postgresql_ops={"extra_metadata": "jsonb_path_ops"},
+        ),
+        # Monthly partitions are managed by app.services.partition_service
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class ThreatFingerprint(Base):
+    """
+    Content fingerprint registry for synthesized threats. A unique index cannot
+    span the partitioned threat table without including created_at, so upserts
+    take ON CONFLICT on this table and then merge into the threat it points to.
+    """
+    __tablename__ = "threat_fingerprint"
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    fingerprint = Column(String(64), nullable=False)
+    # NULL only while the first sighting's threat row is being inserted
+    threat_id = Column(Integer, nullable=True)
+    threat_created_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("fingerprint", name="uq_threat_fingerprint_fingerprint"),
+        Index("ix_threat_fingerprint_threat_id", "threat_id"),
+    )
+
+
+class ThreatMinHash(Base):
+    """
+    MinHash signature of a threat's description plus its LSH band keys, used
+    to find near-duplicate reports of the same incident at ingest.
+    """
+    __tablename__ = "threat_minhash"
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    threat_id = Column(Integer, nullable=False)
+    # NUM_PERM little-endian uint32 minimums
+    signature = Column(LargeBinary, nullable=False)
+    # One 64-bit key per LSH band; two threats are candidates when any key matches
+    bands = Column(ARRAY(BIGINT), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("threat_id", name="uq_threat_minhash_threat_id"),
+        # Candidate lookup: bands && :bands
+        Index("ix_threat_minhash_bands", "bands", postgresql_using="gin"),
+    )
@@ -1,6 +1,7 @@
 from typing import Dict, List, Optional, Any
 from pydantic import BaseModel, Field
 
+from app.core.config import settings
 from app.models.analysis import AnalysisType, AnalysisStatus
 from app.schemas.base import BaseSchema
 
@@ -45,3 +46,19 @@ class AnalysisResult(BaseModel):
     analysis_id: str
     status: AnalysisStatus
     message: str
+
+
+class AutonomousRunRequest(BaseModel):
+    """Schema for running the autonomous pipeline over several objectives"""
+    objectives: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.AUTONOMOUS_MAX_OBJECTIVES,
+        description="Collection objectives, run concurrently; at most AUTONOMOUS_MAX_OBJECTIVES",
+    )
+    max_concurrency: Optional[int] = Field(
+        None,
+        ge=1,
+        le=settings.AUTONOMOUS_MAX_CONCURRENT_OBJECTIVES,
+        description="Objectives run at once; at most and by default AUTONOMOUS_MAX_CONCURRENT_OBJECTIVES",
+    )
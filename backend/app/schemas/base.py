@@ -11,3 +11,8 @@ class BaseSchema(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class BulkMutationResult(BaseModel):
+    """Schema for the outcome of a filter-based bulk update or delete"""
+    affected: int = Field(0, description="Number of rows updated or deleted")
@@ -0,0 +1,17 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+from app.schemas.base import BaseSchema
+
+
+class IOC(BaseSchema):
+    """Normalized Indicator of Compromise"""
+    type: str
+    value: str
+
+
+class IOCBackfillResult(BaseModel):
+    """Schema for the outcome of an IOC backfill run"""
+    threats_scanned: int = 0
+    links_created: int = 0
+    last_threat_id: Optional[int] = Field(None, description="Resume the backfill after this threat ID")
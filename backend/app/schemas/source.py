@@ -1,10 +1,21 @@
-from typing import Dict, Optional, Any
-from pydantic import BaseModel, Field, HttpUrl
+from typing import Annotated, Dict, List, Optional, Any
+from croniter import croniter
+from pydantic import AfterValidator, BaseModel, Field, HttpUrl
 
 from app.models.source import SourceType
 from app.schemas.base import BaseSchema
 
 
+def _check_schedule(schedule: str) -> str:
+    if not croniter.is_valid(schedule):
+        raise ValueError(f"Invalid cron expression: {schedule!r}")
+    return schedule
+
+
+# Collection schedule: a cron expression evaluated in UTC
+CronSchedule = Annotated[str, AfterValidator(_check_schedule)]
+
+
 class BrightDataConfig(BaseModel):
     """Configuration for Bright Data services"""
     service_type: str = Field(..., description="Type of Bright Data service (web_unlocker, web_scraper, proxy)")
@@ -28,7 +39,7 @@ class SourceBase(BaseModel):
 class SourceCreate(SourceBase):
     """Schema for creating a new data source"""
     bright_data_config: Optional[BrightDataConfig] = None
-    schedule: Optional[str] = None
+    schedule: Optional[CronSchedule] = None
     parameters: Optional[Dict[str, Any]] = None
     credentials: Optional[Dict[str, Any]] = None
 
@@ -37,7 +48,7 @@ class SourceUpdate(SourceBase):
     """Schema for updating an existing data source"""
     name: Optional[str] = None
     bright_data_config: Optional[BrightDataConfig] = None
-    schedule: Optional[str] = None
+    schedule: Optional[CronSchedule] = None
     parameters: Optional[Dict[str, Any]] = None
     credentials: Optional[Dict[str, Any]] = None
 
@@ -48,3 +59,24 @@ class Source(SourceBase, BaseSchema):
     schedule: Optional[str] = None
     parameters: Optional[Dict[str, Any]] = None
     last_collection_status: Optional[Dict[str, Any]] = None
+
+
+class SourceFilter(BaseModel):
+    """Which sources a bulk update or delete applies to; all given conditions must match"""
+    ids: Optional[List[int]] = None
+    source_type: Optional[SourceType] = None
+    enabled: Optional[bool] = None
+    parameters: Optional[Dict[str, Any]] = Field(None, description="Document the parameters must contain")
+
+
+class SourceBulkChanges(BaseModel):
+    """Values a bulk update sets"""
+    enabled: Optional[bool] = None
+    schedule: Optional[CronSchedule] = None
+    source_type: Optional[SourceType] = None
+
+
+class SourceBulkUpdate(BaseModel):
+    """Schema for updating every source matching a filter in one statement"""
+    filter: SourceFilter
+    update: SourceBulkChanges
@@ -1,9 +1,24 @@
-from typing import List, Dict, Optional, Any
-from pydantic import BaseModel, Field
+import re
+from datetime import datetime
+from typing import Annotated, List, Dict, Optional, Any
+from pydantic import AfterValidator, BaseModel, Field
 
 from app.models.threat import SeverityLevel, ThreatType
 from app.schemas.base import BaseSchema
 
+# Largest value of the integer source.id column
+_MAX_SOURCE_ID = 2 ** 31 - 1
+
+
+def _check_source_id(source_id: str) -> str:
+    if not re.fullmatch(r"\d+", source_id) or not 0 < int(source_id) <= _MAX_SOURCE_ID:
+        raise ValueError(f"source_id must be a positive integer ID, got {source_id!r}")
+    return source_id
+
+
+# Source ID given as a string, checked to be a valid integer ID before it reaches the database
+SourceId = Annotated[str, AfterValidator(_check_source_id)]
+
 
 class IOCBase(BaseModel):
     """Base schema for Indicators of Compromise"""
@@ -33,6 +48,7 @@ class ThreatBase(BaseModel):
 
 class ThreatCreate(ThreatBase):
     """Schema for creating a new threat"""
+    source_id: Optional[SourceId] = None
     raw_content: Optional[str] = None
     iocs: Optional[List[Dict[str, Any]]] = None
     ttps: Optional[List[Dict[str, Any]]] = None
@@ -42,6 +58,7 @@ class ThreatCreate(ThreatBase):
 
 class ThreatUpdate(ThreatBase):
     """Schema for updating an existing threat"""
+    source_id: Optional[SourceId] = None
     title: Optional[str] = None
     raw_content: Optional[str] = None
     iocs: Optional[List[Dict[str, Any]]] = None
@@ -57,3 +74,67 @@ class Threat(ThreatBase, BaseSchema):
     ttps: Optional[List[Dict[str, Any]]] = None
     metadata: Optional[Dict[str, Any]] = None
     related_threats: Optional[List[str]] = None
+    sightings: int = 1
+    last_seen_at: Optional[datetime] = None
+
+
+class ThreatBulkError(BaseModel):
+    """Schema for an item rejected by bulk ingestion"""
+    index: int = Field(..., description="Zero-based position of the item in the request body")
+    error: str
+
+
+class ThreatBulkResult(BaseModel):
+    """Schema for bulk threat ingestion response"""
+    created: int = 0
+    failed: int = 0
+    ids: List[str] = Field(default_factory=list)
+    errors: List[ThreatBulkError] = Field(default_factory=list)
+
+
+class ThreatFilter(BaseModel):
+    """Which threats a bulk update or delete applies to; all given conditions must match"""
+    ids: Optional[List[int]] = None
+    severity: Optional[SeverityLevel] = None
+    threat_type: Optional[ThreatType] = None
+    since: Optional[datetime] = Field(None, description="Only threats created at or after this time")
+    until: Optional[datetime] = Field(None, description="Only threats created before this time")
+    ttp: Optional[str] = Field(None, description="MITRE ATT&CK technique ID, e.g. T1566")
+    ioc: Optional[str] = Field(None, description="Exact IOC value")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Document the metadata must contain")
+
+
+class ThreatBulkChanges(BaseModel):
+    """Values a bulk update sets; metadata is merged into the existing metadata"""
+    severity: Optional[SeverityLevel] = None
+    threat_type: Optional[ThreatType] = None
+    confidence_score: Optional[float] = Field(None, ge=0.0, le=1.0)
+    source_id: Optional[SourceId] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class ThreatBulkUpdate(BaseModel):
+    """Schema for updating every threat matching a filter in one statement"""
+    filter: ThreatFilter
+    update: ThreatBulkChanges
+
+
+class ThreatBatchGetRequest(BaseModel):
+    """Schema for fetching many threats by ID in one request"""
+    ids: List[int] = Field(..., min_length=1, description="Threat IDs, returned in this order")
+    fields: Optional[str] = Field(
+        None, description="Comma-separated fields to return, or the \"summary\" view; id and created_at are always included"
+    )
+    include_raw_content: bool = False
+
+
+class ThreatBatchGetResult(BaseModel):
+    """Schema for a batch get response: found threats in request order, and IDs that do not exist"""
+    threats: List[Dict[str, Any]] = Field(default_factory=list)
+    missing: List[str] = Field(default_factory=list)
+
+
+class ThreatSearchResult(Threat):
+    """Schema for a ranked full-text search hit"""
+    rank: float = 0.0
+    snippet: Optional[str] = Field(None, description="Matching excerpt with terms wrapped in <mark> tags")
@@ -0,0 +1,38 @@
+"""
+Create upcoming monthly partitions and archive expired ones on demand.
+
+Does the same work as the API's background maintenance loop. Expired partitions
+are exported to zstd-compressed CSV under --archive-dir before being dropped.
+
+    python -m app.scripts.archive_partitions --table threat --retention-months 12
+"""
+import argparse
+import asyncio
+from typing import Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.partition_service import PARTITIONED_TABLES, PartitionService, retention_months
+
+
+async def maintain(table: str, months_ahead: int, retention: Optional[int], archive_dir: str) -> None:
+    async with AsyncSessionLocal() as session:
+        service = PartitionService(session)
+        created = await service.ensure_future_partitions(table, months_ahead)
+        archived = []
+        if retention is not None:
+            archived = await service.archive_expired_partitions(table, retention, archive_dir)
+    logger.info(f"{table}: {len(created)} partitions created, {len(archived)} archived")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--table", choices=PARTITIONED_TABLES, required=True)
+    parser.add_argument("--months-ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--retention-months", type=int, help="Defaults to the table's configured retention")
+    parser.add_argument("--archive-dir", default=settings.PARTITION_ARCHIVE_DIR)
+    args = parser.parse_args()
+    retention = args.retention_months if args.retention_months is not None else retention_months(args.table)
+    asyncio.run(maintain(args.table, args.months_ahead, retention, args.archive_dir))
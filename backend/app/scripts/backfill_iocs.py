@@ -0,0 +1,32 @@
+"""
+Backfill the normalized IOC tables from the legacy Threat.iocs JSON column.
+
+Runs in small committed batches so it can be executed against a live database.
+It is idempotent, and an interrupted run can be resumed with --after-id.
+
+    python -m app.scripts.backfill_iocs --batch-size 1000 --after-id 0
+"""
+import argparse
+import asyncio
+
+from loguru import logger
+
+from app.db.session import AsyncSessionLocal
+from app.services.ioc_service import IOCService
+
+
+async def backfill(batch_size: int, after_id: int) -> None:
+    async with AsyncSessionLocal() as session:
+        outcome = await IOCService(session).backfill_from_threats(batch_size=batch_size, after_id=after_id)
+    logger.info(
+        f"IOC backfill finished: {outcome.threats_scanned} threats scanned, "
+        f"{outcome.links_created} links created"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--after-id", type=int, default=0, help="Resume after this threat ID")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.after_id))
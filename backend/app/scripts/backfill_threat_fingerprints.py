@@ -0,0 +1,65 @@
+"""
+Register content fingerprints for threats stored before fingerprint upserts.
+
+Walks threats newest first in small committed batches. When several existing
+threats share a fingerprint, the newest one is kept as the merge target. It is
+idempotent, and an interrupted run can be resumed with --before-id.
+
+    python -m app.scripts.backfill_threat_fingerprints --batch-size 1000
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.session import AsyncSessionLocal
+from app.models.threat import Threat, ThreatFingerprint
+from app.services.threat_service import threat_fingerprint
+
+
+async def backfill(batch_size: int, before_id: Optional[int]) -> None:
+    scanned = 0
+    async with AsyncSessionLocal() as session:
+        while True:
+            query = (
+                select(Threat.id, Threat.created_at, Threat.title, Threat.threat_type, Threat.iocs)
+                .order_by(Threat.id.desc())
+                .limit(batch_size)
+            )
+            if before_id is not None:
+                query = query.where(Threat.id < before_id)
+            rows = (await session.execute(query)).all()
+            if not rows:
+                break
+            now = datetime.utcnow()
+            entries = {}
+            for row in rows:
+                # Rows arrive newest first, so the first threat seen per fingerprint wins
+                entries.setdefault(threat_fingerprint(row.title, row.threat_type, row.iocs), {
+                    "threat_id": row.id,
+                    "threat_created_at": row.created_at,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+            await session.execute(
+                insert(ThreatFingerprint)
+                .values([{"fingerprint": fingerprint, **entry} for fingerprint, entry in sorted(entries.items())])
+                .on_conflict_do_nothing(index_elements=[ThreatFingerprint.fingerprint])
+            )
+            await session.commit()
+            scanned += len(rows)
+            before_id = rows[-1].id
+            logger.info(f"Fingerprint backfill: {scanned} threats scanned (last threat ID {before_id})")
+    logger.info(f"Fingerprint backfill finished: {scanned} threats scanned")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--before-id", type=int, default=None, help="Resume below this threat ID")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.before_id))
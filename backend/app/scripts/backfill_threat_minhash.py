@@ -0,0 +1,59 @@
+"""
+Index and link threats stored before near-duplicate detection.
+
+Walks threats in created_at order and runs the same step as ingest
+(NearDuplicateService.index_threat) on each: its MinHash signature is stored
+and it is linked through related_threats with the near-duplicates indexed
+before it, so the historical corpus ends up linked as if it had been ingested
+with detection on. Runs in small committed batches, is idempotent, and can be
+resumed with the --after-created-at/--after-id pair it logs.
+
+    python -m app.scripts.backfill_threat_minhash --batch-size 500
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import select, tuple_
+
+from app.db.session import AsyncSessionLocal
+from app.models.threat import Threat
+from app.services.near_duplicate_service import NearDuplicateService
+
+
+async def backfill(batch_size: int, after_created_at: Optional[datetime], after_id: int) -> None:
+    scanned = 0
+    linked = 0
+    async with AsyncSessionLocal() as session:
+        service = NearDuplicateService(session)
+        while True:
+            query = select(Threat).order_by(Threat.created_at, Threat.id).limit(batch_size)
+            if after_created_at is not None:
+                query = query.where(tuple_(Threat.created_at, Threat.id) > tuple_(after_created_at, after_id))
+            threats = (await session.execute(query)).scalars().all()
+            if not threats:
+                break
+            for threat in threats:
+                if await service.index_threat(threat):
+                    linked += 1
+            await session.commit()
+            scanned += len(threats)
+            after_created_at, after_id = threats[-1].created_at, threats[-1].id
+            # Linked rows stay in the identity map otherwise
+            session.expunge_all()
+            logger.info(
+                f"MinHash backfill: {scanned} threats scanned, {linked} linked "
+                f"(resume with --after-created-at {after_created_at.isoformat()} --after-id {after_id})"
+            )
+    logger.info(f"MinHash backfill finished: {scanned} threats scanned, {linked} linked to near-duplicates")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--after-created-at", type=datetime.fromisoformat, default=None, help="Resume after this created_at")
+    parser.add_argument("--after-id", type=int, default=0, help="Resume after this threat ID (with --after-created-at)")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.after_created_at, args.after_id))
@@ -0,0 +1,95 @@
+"""
+Benchmark near-duplicate detection cost per document.
+
+Times signature computation (shingling, MinHash, LSH band keys) on synthetic
+descriptions the size the pipeline stores. With --lookups, also times the
+candidate lookup and verification against the configured database, using
+the descriptions of stored threats, and reports the size of the index it ran
+against; point it at a database holding ~1M indexed threats to check the
+per-document target at that scale.
+
+    python -m app.scripts.bench_near_duplicates --documents 2000 --lookups 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import func, select
+
+from app.db.session import AsyncSessionLocal
+from app.models.threat import Threat, ThreatMinHash
+from app.services.near_duplicate_service import NearDuplicateService, band_keys, minhash_signature, shingles
+
+VOCABULARY = (
+    "threat actor ransomware phishing campaign loader infrastructure credential access exploit "
+    "vulnerability patch healthcare finance sector botnet command control domain payload dropper "
+    "lateral movement exfiltration victims attribution researchers observed malicious activity"
+).split()
+
+
+def synthetic_descriptions(count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(VOCABULARY) for _ in range(rng.randrange(150, 400))) for _ in range(count)]
+
+
+def percentiles(timings: List[float]) -> Dict[str, float]:
+    """Median, p95 and max of timings in seconds, in milliseconds"""
+    ordered = sorted(timings)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95)] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def time_signatures(descriptions: List[str]) -> Dict[str, float]:
+    timings = []
+    for description in descriptions:
+        started = time.perf_counter()
+        band_keys(minhash_signature(shingles(description)))
+        timings.append(time.perf_counter() - started)
+    return percentiles(timings)
+
+
+async def time_lookups(count: int) -> Dict[str, Any]:
+    async with AsyncSessionLocal() as session:
+        indexed = (await session.execute(select(func.count()).select_from(ThreatMinHash))).scalar_one()
+        rows = (await session.execute(
+            select(Threat.id, Threat.description)
+            .where(Threat.description.is_not(None))
+            .order_by(func.random())
+            .limit(count)
+        )).all()
+        service = NearDuplicateService(session)
+        timings = []
+        matches = 0
+        for threat_id, description in rows:
+            hashes = shingles(description)
+            if not hashes:
+                continue
+            started = time.perf_counter()
+            signature = minhash_signature(hashes)
+            duplicates = await service.find_near_duplicates(signature, band_keys(signature), exclude_threat_id=threat_id)
+            timings.append(time.perf_counter() - started)
+            matches += bool(duplicates)
+    if not timings:
+        return {"indexed_threats": indexed, "lookups": 0}
+    return {"indexed_threats": indexed, "lookups": len(timings), "with_matches": matches, **percentiles(timings)}
+
+
+async def run(documents: int, lookups: int) -> Dict[str, Any]:
+    report: Dict[str, Any] = {"signature": {"documents": documents, **time_signatures(synthetic_descriptions(documents))}}
+    if lookups:
+        report["signature_and_lookup"] = await time_lookups(lookups)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=0, help="Stored threats to look up in the database (0 skips it)")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.documents, args.lookups)), indent=2))
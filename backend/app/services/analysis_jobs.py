@@ -0,0 +1,151 @@
+"""
+In-process worker pool running submitted analyses in the background.
+
+POST /analysis stores a PENDING analysis and submits its ID here; one of
+ANALYSIS_MAX_CONCURRENT_JOBS workers claims it (PENDING -> PROCESSING) and
+records COMPLETED or FAILED. The Analysis row is the source of truth for
+status, so clients poll /analysis/results/{id}. Cancelling marks the row
+CANCELLED and, when this process runs the job, cancels its task so the slot
+frees at once. Analyses still PENDING when the process stops (or interrupted
+while PROCESSING at shutdown) are picked up again on the next start.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.analysis import AnalysisStatus
+from app.services.analysis_service import AnalysisService
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when an analysis is submitted while the job queue is full"""
+
+
+class AnalysisJobPool:
+    """Bounded queue of analysis IDs served by a fixed number of worker tasks"""
+
+    def __init__(self, max_workers: int, max_queued: int):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._queue: Optional["asyncio.Queue[int]"] = None
+        self._workers: List[asyncio.Task] = []
+        # Analysis ID -> task of the job a worker is running
+        self._running: Dict[int, asyncio.Task] = {}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.skipped = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not worker.done() for worker in self._workers)
+
+    async def start(self) -> None:
+        """Start the workers and resubmit analyses left PENDING by a previous process"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+        try:
+            async with AsyncSessionLocal() as session:
+                pending = await AnalysisService(session).get_pending_analysis_ids(self.max_queued)
+        except Exception as e:
+            logger.error(f"Could not load pending analyses: {e}")
+            return
+        for analysis_id in pending:
+            self.submit(analysis_id)
+        if pending:
+            logger.info(f"Resubmitted {len(pending)} pending analyses")
+
+    @property
+    def full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    def submit(self, analysis_id: int) -> None:
+        """Queue a PENDING analysis; raises JobQueueFullError when the queue is full"""
+        if self._queue is None:
+            raise JobQueueFullError("Analysis job pool is not running")
+        try:
+            self._queue.put_nowait(analysis_id)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"{self.max_queued} analyses are already queued")
+        self.submitted += 1
+
+    def cancel(self, analysis_id: int) -> bool:
+        """
+        Cancel the job of an analysis if this process is running it, freeing
+        its worker. Queued analyses need no action: once marked CANCELLED
+        they cannot be claimed and are skipped.
+        """
+        task = self._running.get(analysis_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def stop(self) -> None:
+        """Cancel workers and running jobs, putting interrupted analyses back to PENDING"""
+        interrupted = list(self._running)
+        for task in [*self._workers, *self._running.values()]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._running.values(), return_exceptions=True)
+        self._workers = []
+        if interrupted:
+            async with AsyncSessionLocal() as session:
+                await AnalysisService(session).release_analyses(interrupted)
+            logger.info(f"Released {len(interrupted)} interrupted analyses")
+
+    async def _worker(self) -> None:
+        while True:
+            analysis_id = await self._queue.get()
+            job = asyncio.create_task(self._run(analysis_id))
+            self._running[analysis_id] = job
+            try:
+                # wait() rather than await: a cancelled job must not stop the worker
+                await asyncio.wait([job])
+            finally:
+                self._running.pop(analysis_id, None)
+
+    async def _run(self, analysis_id: int) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                outcome = await AnalysisService(session).run_analysis(analysis_id)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            logger.info(f"Analysis {analysis_id} cancelled")
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Analysis job {analysis_id} crashed: {e}")
+            return
+        if outcome is None:
+            self.skipped += 1
+        elif outcome == AnalysisStatus.COMPLETED:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Pool occupancy and cumulative counters"""
+        return {
+            "workers": self.max_workers,
+            "busy": len(self._running),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "skipped": self.skipped,
+        }
+
+
+# Started and stopped by the API's startup/shutdown hooks
+analysis_job_pool = AnalysisJobPool(
+    max_workers=settings.ANALYSIS_MAX_CONCURRENT_JOBS,
+    max_queued=settings.ANALYSIS_JOB_QUEUE_MAX_SIZE,
+)
@@ -1,15 +1,115 @@
-from typing import List, Optional, Dict, Any
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Dict, Any, Sequence, Tuple
 import uuid
 import json
-from sqlalchemy import select
+from sqlalchemy import Select, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 import litellm
 from loguru import logger
 
-from app.models.analysis import Analysis, AnalysisStatus
-from app.schemas.analysis import AnalysisCreate, AnalysisResult
+from app.db.cache import cache_key, detach, query_cache
+from app.db.compression import decompress_text
+from app.db.filters import any_of, apply_time_range
+from app.db.pagination import paginate
+from app.db.projection import load_columns
+from app.db.session import AsyncSessionLocal
+from app.models.analysis import Analysis, AnalysisStatus, AnalysisType
+from app.schemas.analysis import AnalysisCreate
 from app.core.config import settings
 
+# Query cache namespaces: list pages, and single results by ID
+ANALYSIS_LIST_CACHE = "analysis_results"
+ANALYSIS_CACHE = "analysis_result"
+
+
+def invalidate_analysis_cache(*analysis_ids: Any) -> None:
+    """Drop cached analysis result pages, and the cached rows of the given results"""
+    query_cache.invalidate(ANALYSIS_LIST_CACHE)
+    if analysis_ids:
+        query_cache.invalidate(
+            ANALYSIS_CACHE,
+            *(cache_key(str(analysis_id), "row") for analysis_id in analysis_ids),
+        )
+
+
+async def iter_autonomous_threat_intel(
+    objectives: list[str],
+    max_concurrency: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the autonomous pipeline for each objective concurrently, at most
+    max_concurrency at a time (capped at AUTONOMOUS_MAX_CONCURRENT_OBJECTIVES,
+    the default), and yield each objective's result as soon as it finishes. Results carry
+    the objective's position in `objectives` as "index". Objectives that
+    collect nothing yield no result.
+    """
+    limit = settings.AUTONOMOUS_MAX_CONCURRENT_OBJECTIVES
+    semaphore = asyncio.Semaphore(min(max_concurrency or limit, limit))
+
+    async def run(index: int, objective: str) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            result = await _run_objective(objective)
+        return {"index": index, **result} if result is not None else None
+
+    tasks = [asyncio.create_task(run(index, objective)) for index, objective in enumerate(objectives)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result is not None:
+                yield result
+    finally:
+        # The consumer stopped early or was cancelled: stop the remaining objectives
+        # and wait for their agent cleanup before the caller moves on
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _run_objective(objective: str) -> Optional[Dict[str, Any]]:
+    """
+    For one objective:
+        1. Run data collection pipeline
+        2. Pass output to threat analysis pipeline
+        3. Store both results in the database
+    Each objective gets its own pipeline instance and DB session, so
+    concurrent objectives share no agent state or connection.
+    """
+    from app.agents.threat_analysis.agent import create_data_collection_pipeline
+    pipeline = create_data_collection_pipeline()
+    try:
+        # Step 1: Data Collection
+        data_result = await pipeline.run(objective)
+        content = data_result.get("synthesized_intel") or data_result.get("collected_data")
+        if not content:
+            return None
+        # Step 2: Threat Analysis
+        analysis_result = await pipeline.run(content)
+        # Step 3: Store in DB
+        db_analysis = Analysis(
+            content=content,
+            analysis_type=AnalysisType.AUTONOMOUS,
+            content_id=None,
+            status=AnalysisStatus.COMPLETED,
+            model_parameters=None,
+            results=analysis_result,
+        )
+        async with AsyncSessionLocal() as session:
+            session.add(db_analysis)
+            await session.commit()
+        invalidate_analysis_cache(db_analysis.id)
+        return {
+            "objective": objective,
+            "data_collection": data_result,
+            "threat_analysis": analysis_result,
+            "db_id": db_analysis.id
+        }
+    except Exception as e:
+        logger.error(f"Autonomous run failed for objective {objective!r}: {e}")
+        return {"objective": objective, "error": str(e)}
+
+
 class AnalysisService:
     """Service for AI-powered threat analysis"""
     
@@ -28,96 +128,194 @@ class AnalysisService:
         skip: int = 0, 
         limit: int = 100,
         status: Optional[str] = None,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        include_content: bool = False,
+        columns: Optional[Sequence[str]] = None,
+        version: Optional[Tuple[Optional[datetime], int]] = None,
     ) -> List[Analysis]:
-        """Get list of analysis results with optional filtering"""
-        query = select(Analysis).offset(skip).limit(limit)
-        
-        # Apply filters if provided
+        """
+        Get list of analysis results with optional filtering, newest first.
+        Analyzed content is only loaded when include_content is set; `columns`
+        restricts the SELECT to those attributes instead. Pages may come from
+        the query cache; `version` (see get_analysis_results_version) is part
+        of the key.
+        """
+        async def load() -> List[Analysis]:
+            query = paginate(select(Analysis), Analysis, cursor, limit, skip=skip)
+            if columns:
+                query = query.options(load_columns(Analysis, columns))
+            elif include_content:
+                query = query.options(undefer(Analysis.content_zstd))
+            query = self._apply_filters(query, status=status, since=since, until=until)
+
+            result = await self.db.execute(query)
+            results = result.scalars().all()
+            detach(self.db, results)
+            return results
+
+        key = cache_key(
+            "page",
+            skip=skip,
+            limit=limit,
+            status=status,
+            cursor=cursor,
+            since=since,
+            until=until,
+            include_content=include_content,
+            columns=columns,
+            version=version,
+        )
+        return await query_cache.get_or_load(ANALYSIS_LIST_CACHE, key, load)
+
+    @staticmethod
+    def _apply_filters(
+        query: Select,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Select:
+        query = apply_time_range(query, Analysis.created_at, since, until)
         if status:
             query = query.filter(Analysis.status == status)
-        
-        result = await self.db.execute(query)
-        return result.scalars().all()
-    
-    async def get_analysis_result(self, analysis_id: str) -> Optional[Analysis]:
-        """Get a specific analysis result by ID"""
-        query = select(Analysis).filter(Analysis.id == analysis_id)
-        result = await self.db.execute(query)
+        return query
+
+    async def get_analysis_results_version(self, **filters: Any) -> Tuple[Optional[datetime], int]:
+        """Newest updated_at and row count of the results matching the list filters (uncached)"""
+        query = select(func.max(Analysis.updated_at), func.count()).select_from(Analysis)
+        row = (await self.db.execute(self._apply_filters(query, **filters))).one()
+        return row[0], row[1]
+
+    async def get_analysis_result_updated_at(self, analysis_id: int) -> Optional[datetime]:
+        """updated_at of one analysis result, without loading the row"""
+        result = await self.db.execute(select(Analysis.updated_at).filter(Analysis.id == analysis_id))
         return result.scalar_one_or_none()
     
-    async def analyze_content(self, analysis_data: AnalysisCreate) -> AnalysisResult:
-        """Submit content for threat analysis (manual or API-triggered)"""
-        # Analyze the content using the modular threat_analysis_agent
-        from app.agents.threat_analysis.agent import root_agent as threat_analysis_agent
-        analysis_result = await threat_analysis_agent.run(analysis_data.content)
+    async def get_analysis_result(self, analysis_id: str, updated_at: Optional[datetime] = None) -> Optional[Analysis]:
+        """
+        Get a specific analysis result by ID, including its content. The row
+        may come from the query cache and is detached: treat it as read-only.
+        A cached row whose updated_at is not `updated_at` is reloaded.
+        """
+        async def load() -> Optional[Analysis]:
+            query = select(Analysis).options(undefer(Analysis.content_zstd)).filter(Analysis.id == analysis_id)
+            result = await self.db.execute(query)
+            analysis = result.scalar_one_or_none()
+            detach(self.db, [analysis])
+            return analysis
 
-        # Create a new analysis record
+        key = cache_key(str(analysis_id), "row")
+        analysis = await query_cache.get_or_load(ANALYSIS_CACHE, key, load)
+        if updated_at is not None and analysis is not None and analysis.updated_at != updated_at:
+            # Cached before a write in another process; reload to match the fresh version
+            query_cache.invalidate(ANALYSIS_CACHE, key)
+            analysis = await query_cache.get_or_load(ANALYSIS_CACHE, key, load)
+        return analysis
+    
+    async def submit_analysis(self, analysis_data: AnalysisCreate) -> Analysis:
+        """Store content for threat analysis as a PENDING analysis for the job pool to run"""
         db_analysis = Analysis(
             content=analysis_data.content,
             analysis_type=analysis_data.analysis_type,
             content_id=analysis_data.content_id,
             status=AnalysisStatus.PENDING,
             model_parameters=analysis_data.model_parameters,
-            results=analysis_result,
         )
         self.db.add(db_analysis)
         await self.db.commit()
-        await self.db.refresh(db_analysis)
-        db_analysis.status = AnalysisStatus.COMPLETED
-        await self.db.commit()
-        return analysis_result
+        invalidate_analysis_cache(db_analysis.id)
+        return db_analysis
 
-    async def run_autonomous_threat_intel(self, objectives: list[str]):
+    async def run_analysis(self, analysis_id: int) -> Optional[AnalysisStatus]:
         """
-        Run the autonomous end-to-end pipeline for a list of objectives.
-        For each objective:
-            1. Run data collection pipeline
-            2. Pass output to threat analysis pipeline
-            3. Store both results in the database
+        Claim a PENDING analysis, run the threat analysis agent on its content
+        and record the outcome. Returns the final status, or None if the
+        analysis was not PENDING (cancelled, or claimed by another worker).
         """
-        from app.agents.threat_analysis.agent import root_agent as data_collection_pipeline
-        from app.agents.threat_analysis.agent import root_agent as threat_analysis_agent
-        results = []
-        for objective in objectives:
-            try:
-                # Step 1: Data Collection
-                data_result = await data_collection_pipeline.run(objective)
-                content = data_result.get("synthesized_intel") or data_result.get("collected_data")
-                if not content:
-                    continue
-                # Step 2: Threat Analysis
-                analysis_result = await threat_analysis_agent.run(content)
-                # Step 3: Store in DB
-                db_analysis = Analysis(
-                    content=content,
-                    analysis_type="autonomous",
-                    content_id=None,
-                    status=AnalysisStatus.COMPLETED,
-                    model_parameters=None,
-                    results=analysis_result,
-                )
-                self.db.add(db_analysis)
-                await self.db.commit()
-                await self.db.refresh(db_analysis)
-                results.append({
-                    "objective": objective,
-                    "data_collection": data_result,
-                    "threat_analysis": analysis_result,
-                    "db_id": db_analysis.id
-                })
-            except Exception as e:
-                results.append({"objective": objective, "error": str(e)})
-        return results
+        claimed = await self._transition(
+            analysis_id, AnalysisStatus.PENDING, AnalysisStatus.PROCESSING, returning=Analysis.content_zstd
+        )
+        if claimed is None:
+            return None
+        content = decompress_text(claimed)
+
+        # Each job gets its own pipeline instance; see create_data_collection_pipeline
+        from app.agents.threat_analysis.agent import create_data_collection_pipeline
+        threat_analysis_agent = create_data_collection_pipeline()
+        try:
+            analysis_result = await threat_analysis_agent.run(content)
+        except Exception as e:
+            logger.error(f"Analysis {analysis_id} failed: {e}")
+            await self._transition(analysis_id, AnalysisStatus.PROCESSING, AnalysisStatus.FAILED, error=str(e))
+            return AnalysisStatus.FAILED
+        await self._transition(
+            analysis_id, AnalysisStatus.PROCESSING, AnalysisStatus.COMPLETED, results=analysis_result
+        )
+        return AnalysisStatus.COMPLETED
+
+    async def cancel_analysis(self, analysis_id: int) -> Optional[AnalysisStatus]:
+        """
+        Mark a PENDING or PROCESSING analysis CANCELLED. Returns the status
+        the analysis ends up in (unchanged if it had already finished), or
+        None if it does not exist.
+        """
+        for current in (AnalysisStatus.PENDING, AnalysisStatus.PROCESSING):
+            if await self._transition(analysis_id, current, AnalysisStatus.CANCELLED) is not None:
+                return AnalysisStatus.CANCELLED
+        result = await self.db.execute(select(Analysis.status).where(Analysis.id == analysis_id))
+        return result.scalar_one_or_none()
 
+    async def release_analyses(self, analysis_ids: Sequence[int]) -> None:
+        """Put analyses interrupted while PROCESSING back to PENDING, so they run again"""
+        if not analysis_ids:
+            return
+        await self.db.execute(
+            update(Analysis)
+            .where(any_of(Analysis.id, analysis_ids), Analysis.status == AnalysisStatus.PROCESSING)
+            .values(status=AnalysisStatus.PENDING, updated_at=datetime.utcnow())
+        )
         await self.db.commit()
-        await self.db.refresh(db_analysis)
+        invalidate_analysis_cache(*analysis_ids)
 
-        return AnalysisResult(
-            analysis_id=db_analysis.id,
-            status=AnalysisStatus.COMPLETED,
-            message="Analysis completed successfully",
+    async def get_pending_analysis_ids(self, limit: int) -> List[int]:
+        """Oldest PENDING analyses, e.g. left over from a previous process"""
+        result = await self.db.execute(
+            select(Analysis.id)
+            .where(Analysis.status == AnalysisStatus.PENDING)
+            .order_by(Analysis.created_at, Analysis.id)
+            .limit(limit)
         )
-    
+        return result.scalars().all()
+
+    async def _transition(
+        self,
+        analysis_id: int,
+        current: AnalysisStatus,
+        new: AnalysisStatus,
+        returning: Any = None,
+        **values: Any,
+    ) -> Any:
+        """
+        Move an analysis from `current` to `new` status in one conditional
+        UPDATE and commit. Returns the `returning` column (the ID by default),
+        or None if the analysis was not in `current` status, so concurrent
+        transitions (e.g. a cancel racing completion) never overwrite each other.
+        """
+        result = await self.db.execute(
+            update(Analysis)
+            .where(Analysis.id == analysis_id, Analysis.status == current)
+            .values(status=new, updated_at=datetime.utcnow(), **values)
+            .returning(returning if returning is not None else Analysis.id),
+            execution_options={"synchronize_session": False},
+        )
+        row = result.one_or_none()
+        await self.db.commit()
+        if row is None:
+            return None
+        invalidate_analysis_cache(analysis_id)
+        return row[0]
+
     async def extract_iocs(self, text: str) -> Dict[str, Any]:
         """Extract Indicators of Compromise from text using LLM"""
         try:
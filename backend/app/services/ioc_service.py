@@ -0,0 +1,405 @@
+import ipaddress
+import re
+from datetime import datetime
+from typing import List, Optional, Dict, Any, AsyncIterator, Iterable, Tuple
+from urllib.parse import urlsplit
+
+from sqlalchemy import select, delete, tuple_, bindparam
+from sqlalchemy.dialects.postgresql import CIDR, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from app.db.filters import apply_time_range
+from app.models.ioc import IOC, ThreatIOC
+from app.models.threat import Threat
+from app.schemas.ioc import IOCBackfillResult
+
+# Aliases emitted by the agents / external feeds mapped onto one canonical type
+IOC_TYPE_ALIASES = {
+    "ipv4": "ip",
+    "ipv6": "ip",
+    "ip_address": "ip",
+    "ip_addresses": "ip",
+    "domains": "domain",
+    "hostname": "domain",
+    "urls": "url",
+    "emails": "email",
+    "email_address": "email",
+    "hashes": "hash",
+}
+
+# Rows per multi-row statement; keeps bind parameters well under the Postgres limit
+IOC_CHUNK_SIZE = 1000
+
+# Types whose values are case-insensitive and are therefore lowercased
+CASE_INSENSITIVE_IOC_TYPES = {"ip", "domain", "email", "hash", "md5", "sha1", "sha256", "c2_server"}
+
+
+# IOC types whose values carry a hostname that can be indexed by reversed labels
+DOMAIN_KEY_IOC_TYPES = {"domain", "c2_server", "url", "email"}
+
+# Hostnames only: at least one letter, so bare IP addresses never get a domain key
+HOSTNAME_RE = re.compile(r"^(?=.*[a-z])[a-z0-9_-]+(\.[a-z0-9_-]+)*$")
+
+
+def reverse_domain(host: str) -> Optional[str]:
+    """Reverse the labels of a hostname: "www.evil-cdn.net" -> "net.evil-cdn.www." """
+    host = host.strip().lower().rstrip(".")
+    if not HOSTNAME_RE.match(host):
+        return None
+    return ".".join(reversed(host.split("."))) + "."
+
+
+def domain_key(ioc_type: str, value: str) -> Optional[str]:
+    """Reversed-label key for the hostname in a normalized IOC, if it has one"""
+    if ioc_type not in DOMAIN_KEY_IOC_TYPES:
+        return None
+    host = value
+    if ioc_type == "url":
+        try:
+            host = urlsplit(value if "//" in value else f"//{value}").hostname
+        except ValueError:
+            return None
+    elif ioc_type == "email":
+        host = value.rpartition("@")[2]
+    return reverse_domain(host) if host else None
+
+
+def domain_pattern_range(pattern: str) -> Tuple[str, str, bool]:
+    """
+    Translate a domain pattern into a reversed-key range [lower, upper).
+    "evil-cdn.net" matches the domain and everything under it; "*.evil-cdn.net"
+    matches subdomains only. The boolean reports whether the apex is excluded.
+    """
+    pattern = pattern.strip().lower()
+    subdomains_only = pattern.startswith(("*.", "."))
+    prefix = reverse_domain(pattern.lstrip("*").lstrip("."))
+    if not prefix:
+        raise ValueError(f"Invalid domain pattern: {pattern!r}")
+    # Keys sharing the prefix sort before prefix-with-"." bumped to the next byte ("/")
+    return prefix, prefix[:-1] + "/", subdomains_only
+
+
+# IOC types whose values may be an IP address or network
+IP_IOC_TYPES = {"ip", "c2_server", "cidr"}
+
+
+def ip_value(ioc_type: str, value: str) -> Optional[str]:
+    """The inet form of an IP-bearing IOC ("45.134.26.7", "45.134.26.0/24"), if it has one"""
+    if ioc_type not in IP_IOC_TYPES:
+        return None
+    try:
+        if "/" in value:
+            return str(ipaddress.ip_network(value, strict=False))
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        # c2_server values are frequently "host:port"; accept an IPv4 with a port
+        host, _, port = value.rpartition(":")
+        if host and port.isdigit() and host.count(":") == 0:
+            try:
+                return str(ipaddress.ip_address(host))
+            except ValueError:
+                return None
+        return None
+
+
+def normalize_ioc_type(ioc_type: str) -> str:
+    """Map an IOC type onto its canonical name"""
+    norm_type = str(ioc_type).strip().lower()
+    return IOC_TYPE_ALIASES.get(norm_type, norm_type)
+
+
+def normalize_ioc(ioc_type: Optional[str], value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Normalize an IOC into its canonical (type, value) pair.
+    Returns None when the IOC is unusable (missing type or value).
+    """
+    if not ioc_type or value is None:
+        return None
+    norm_type = normalize_ioc_type(ioc_type)
+    norm_value = str(value).strip()
+    if not norm_type or not norm_value:
+        return None
+    if norm_type in CASE_INSENSITIVE_IOC_TYPES:
+        norm_value = norm_value.lower()
+    if norm_type == "domain":
+        norm_value = norm_value.rstrip(".")
+    return norm_type, norm_value
+
+
+class IOCService:
+    """Service for the normalized IOC index backing threat pivots"""
+
+    def __init__(self, db: AsyncSession):
+        """Initialize with database session"""
+        self.db = db
+
+    async def upsert_iocs(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """Insert any missing IOCs and return a mapping of (type, value) to IOC ID"""
+        # Sorted so concurrent writers take row locks in the same order
+        unique_pairs = sorted(set(pairs))
+        ioc_ids: Dict[Tuple[str, str], int] = {}
+        for start in range(0, len(unique_pairs), IOC_CHUNK_SIZE):
+            chunk = unique_pairs[start:start + IOC_CHUNK_SIZE]
+            await self.db.execute(
+                insert(IOC)
+                .values([
+                    {"type": t, "value": v, "reversed_domain": domain_key(t, v), "ip_address": ip_value(t, v)}
+                    for t, v in chunk
+                ])
+                .on_conflict_do_nothing(index_elements=[IOC.type, IOC.value])
+            )
+            result = await self.db.execute(
+                select(IOC.id, IOC.type, IOC.value).where(tuple_(IOC.type, IOC.value).in_(chunk))
+            )
+            ioc_ids.update({(row.type, row.value): row.id for row in result})
+        return ioc_ids
+
+    async def link_threat_iocs(
+        self,
+        threat_id: int,
+        iocs: Optional[List[Dict[str, Any]]],
+        replace: bool = False,
+    ) -> int:
+        """
+        Write the IOCs of a threat through to the normalized tables.
+        Does not commit; the caller owns the transaction.
+        Returns the number of new threat/IOC links.
+        """
+        return await self.link_threats_iocs({threat_id: iocs}, replace=replace)
+
+    async def link_threats_iocs(
+        self,
+        threat_iocs: Dict[int, Optional[List[Dict[str, Any]]]],
+        replace: bool = False,
+    ) -> int:
+        """
+        Write the IOCs of many threats through to the normalized tables in bulk.
+        Does not commit; the caller owns the transaction.
+        Returns the number of new threat/IOC links.
+        """
+        if replace and threat_iocs:
+            await self.db.execute(delete(ThreatIOC).where(ThreatIOC.threat_id.in_(list(threat_iocs))))
+
+        confidences: Dict[Tuple[int, Tuple[str, str]], float] = {}
+        for threat_id, iocs in threat_iocs.items():
+            for ioc in iocs or []:
+                if not isinstance(ioc, dict):
+                    continue
+                pair = normalize_ioc(ioc.get("type"), ioc.get("value"))
+                if not pair:
+                    continue
+                confidence = float(ioc.get("confidence") or 0.0)
+                key = (threat_id, pair)
+                confidences[key] = max(confidence, confidences.get(key, 0.0))
+
+        if not confidences:
+            return 0
+
+        ioc_ids = await self.upsert_iocs(pair for _, pair in confidences)
+        rows = [
+            {"threat_id": threat_id, "ioc_id": ioc_ids[pair], "confidence": confidence}
+            for (threat_id, pair), confidence in confidences.items()
+            if pair in ioc_ids
+        ]
+        created = 0
+        for start in range(0, len(rows), IOC_CHUNK_SIZE):
+            result = await self.db.execute(
+                insert(ThreatIOC)
+                .values(rows[start:start + IOC_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=[ThreatIOC.threat_id, ThreatIOC.ioc_id])
+                .returning(ThreatIOC.id)
+            )
+            created += len(result.all())
+        return created
+
+    async def get_iocs(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        ioc_type: Optional[str] = None,
+    ) -> List[IOC]:
+        """Get list of IOCs with optional type filtering"""
+        query = select(IOC).order_by(IOC.id).offset(skip).limit(limit)
+        if ioc_type:
+            query = query.filter(IOC.type == normalize_ioc_type(ioc_type))
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def stream_iocs(
+        self,
+        ioc_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[IOC]]:
+        """Yield every matching IOC in ID order, in batches, through a server-side cursor"""
+        query = select(IOC).order_by(IOC.id).execution_options(yield_per=batch_size)
+        if ioc_type:
+            query = query.filter(IOC.type == normalize_ioc_type(ioc_type))
+        query = apply_time_range(query, IOC.created_at, since, until)
+        result = await self.db.stream_scalars(query)
+        async for batch in result.partitions():
+            yield batch
+
+    async def get_threats_for_ioc(
+        self,
+        value: str,
+        ioc_type: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Threat]:
+        """Get the threats mentioning an IOC, resolved through the (type, value) index"""
+        query = (
+            select(Threat)
+            .join(ThreatIOC, ThreatIOC.threat_id == Threat.id)
+            .join(IOC, IOC.id == ThreatIOC.ioc_id)
+            .order_by(Threat.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        if ioc_type:
+            pair = normalize_ioc(ioc_type, value)
+            if not pair:
+                return []
+            query = query.filter(IOC.type == pair[0], IOC.value == pair[1])
+        else:
+            # Without a type, match the value under any type that could have normalized it
+            candidates = {value.strip(), value.strip().lower(), value.strip().lower().rstrip(".")}
+            query = query.filter(IOC.value.in_(candidates))
+
+        result = await self.db.execute(query)
+        return result.scalars().unique().all()
+
+    def _domain_filter(self, pattern: str) -> list:
+        """Range predicates on the reversed-domain index for a domain pattern"""
+        lower, upper, subdomains_only = domain_pattern_range(pattern)
+        clauses = [IOC.reversed_domain >= lower, IOC.reversed_domain < upper]
+        if subdomains_only:
+            clauses.append(IOC.reversed_domain != lower)
+        return clauses
+
+    async def get_iocs_by_domain(
+        self,
+        pattern: str,
+        skip: int = 0,
+        limit: int = 100,
+        ioc_type: Optional[str] = None,
+    ) -> List[IOC]:
+        """Get IOCs whose hostname matches a domain pattern such as *.evil-cdn.net"""
+        query = (
+            select(IOC)
+            .where(*self._domain_filter(pattern))
+            .order_by(IOC.reversed_domain, IOC.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        if ioc_type:
+            query = query.filter(IOC.type == normalize_ioc_type(ioc_type))
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def get_threats_by_domain(
+        self,
+        pattern: str,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Threat]:
+        """Get the threats mentioning any IOC under a domain pattern"""
+        matching = (
+            select(ThreatIOC.threat_id)
+            .join(IOC, IOC.id == ThreatIOC.ioc_id)
+            .where(*self._domain_filter(pattern))
+        )
+        query = (
+            select(Threat)
+            .where(Threat.id.in_(matching))
+            .order_by(Threat.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    def _cidr_filter(self, cidr: str):
+        """Containment predicate (<<=) on the GiST inet index for a network block"""
+        try:
+            network = str(ipaddress.ip_network(cidr.strip(), strict=False))
+        except ValueError as e:
+            raise ValueError(f"Invalid CIDR: {cidr!r}") from e
+        return IOC.ip_address.op("<<=")(bindparam("cidr", network, type_=CIDR))
+
+    async def get_iocs_by_cidr(
+        self,
+        cidr: str,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[IOC]:
+        """Get IP indicators inside a network block such as 45.134.26.0/24"""
+        query = (
+            select(IOC)
+            .where(self._cidr_filter(cidr))
+            .order_by(IOC.ip_address, IOC.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def get_threats_by_cidr(
+        self,
+        cidr: str,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Threat]:
+        """Get the threats mentioning any IP indicator inside a network block"""
+        matching = (
+            select(ThreatIOC.threat_id)
+            .join(IOC, IOC.id == ThreatIOC.ioc_id)
+            .where(self._cidr_filter(cidr))
+        )
+        query = (
+            select(Threat)
+            .where(Threat.id.in_(matching))
+            .order_by(Threat.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def backfill_from_threats(
+        self,
+        batch_size: int = 1000,
+        after_id: int = 0,
+        max_batches: Optional[int] = None,
+    ) -> IOCBackfillResult:
+        """
+        Backfill the IOC tables from the legacy Threat.iocs JSON column.
+        Walks threats in primary-key order and commits per batch so it can run
+        against a live database; re-running is safe and resumes from after_id.
+        """
+        outcome = IOCBackfillResult(last_threat_id=after_id)
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            result = await self.db.execute(
+                select(Threat.id, Threat.iocs)
+                .where(Threat.id > outcome.last_threat_id)
+                .order_by(Threat.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            outcome.links_created += await self.link_threats_iocs({row.id: row.iocs for row in rows})
+            await self.db.commit()
+
+            outcome.threats_scanned += len(rows)
+            outcome.last_threat_id = rows[-1].id
+            batches += 1
+            logger.info(
+                f"IOC backfill: {outcome.threats_scanned} threats scanned, "
+                f"{outcome.links_created} links created (last threat ID {outcome.last_threat_id})"
+            )
+        return outcome
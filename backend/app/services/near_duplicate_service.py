@@ -0,0 +1,173 @@
+import hashlib
+import re
+import zlib
+from typing import Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import BigInteger, bindparam, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.threat import Threat, ThreatMinHash
+
+# Signature length and LSH banding. With 32 bands of 4 rows, pairs become
+# candidates from a Jaccard similarity of about (1/32) ** (1/4) ~= 0.42
+NUM_PERM = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+# Word n-grams per shingle
+SHINGLE_SIZE = 3
+
+# Estimated Jaccard similarity from which a candidate counts as a near-duplicate
+NEAR_DUPLICATE_THRESHOLD = 0.5
+
+# Upper bound on candidates verified per document, so hot buckets stay cheap.
+# Candidates sharing the most bands are verified first: in a hot bucket the
+# true near-duplicates share many bands, unrelated documents only one or two.
+MAX_CANDIDATES = 50
+
+# Number of LSH bands a stored signature shares with :query_bands
+_SHARED_BANDS = text(
+    "cardinality(ARRAY(SELECT unnest(threat_minhash.bands) INTERSECT SELECT unnest(:query_bands))) DESC"
+)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed: stored signatures are only comparable if every process draws the same permutations
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: Optional[str]) -> Set[int]:
+    """32-bit hashes of the word n-grams of `text`, case- and punctuation-insensitive"""
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        grams: Iterable[str] = [" ".join(words)] if words else []
+    else:
+        grams = (" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+    return {zlib.crc32(gram.encode("utf-8")) for gram in grams}
+
+
+def minhash_signature(hashes: Set[int]) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of a non-empty shingle set"""
+    values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    # Universal hashing (a * x + b) mod p, vectorized over shingles x permutations
+    permuted = ((values[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> List[int]:
+    """One signed 64-bit key per LSH band; the band number is hashed in so bands never collide"""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].astype("<u4").tobytes()
+        digest = hashlib.blake2b(band.to_bytes(2, "little") + rows, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def signature_to_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype("<u4").tobytes()
+
+
+def signature_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(bytes(data), dtype="<u4")
+
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity: the fraction of matching signature slots"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def _with_ids(related: Optional[List[str]], ids: Iterable[int]) -> List[str]:
+    merged = list(related or [])
+    merged.extend(str(threat_id) for threat_id in ids if str(threat_id) not in merged)
+    return merged
+
+
+class NearDuplicateService:
+    """MinHash/LSH index over threat descriptions, maintained as threats are stored"""
+
+    def __init__(self, db: AsyncSession):
+        """Initialize with database session"""
+        self.db = db
+
+    async def find_near_duplicates(
+        self,
+        signature: np.ndarray,
+        bands: List[int],
+        exclude_threat_id: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Indexed threats sharing an LSH band whose estimated similarity passes
+        the threshold. At most MAX_CANDIDATES are verified, those sharing the
+        most bands first.
+        """
+        query = (
+            select(ThreatMinHash.threat_id, ThreatMinHash.signature)
+            .where(ThreatMinHash.bands.overlap(bands))
+            .order_by(
+                _SHARED_BANDS.bindparams(bindparam("query_bands", bands, type_=ARRAY(BigInteger))),
+                ThreatMinHash.threat_id.desc(),
+            )
+            .limit(MAX_CANDIDATES)
+        )
+        if exclude_threat_id is not None:
+            query = query.where(ThreatMinHash.threat_id != exclude_threat_id)
+        result = await self.db.execute(query)
+        duplicates = []
+        for threat_id, stored in result.all():
+            similarity = estimate_similarity(signature, signature_from_bytes(stored))
+            if similarity >= NEAR_DUPLICATE_THRESHOLD:
+                duplicates.append((threat_id, similarity))
+        return sorted(duplicates, key=lambda item: item[1], reverse=True)
+
+    async def index_threat(self, threat: Threat) -> List[Tuple[int, float]]:
+        """
+        Add a threat's description to the index and link it with any
+        near-duplicates through related_threats. Returns (threat ID, similarity)
+        for each near-duplicate found. The caller commits.
+        """
+        hashes = shingles(threat.description)
+        if not hashes:
+            return []
+        signature = minhash_signature(hashes)
+        bands = band_keys(signature)
+        duplicates = await self.find_near_duplicates(signature, bands, exclude_threat_id=threat.id)
+
+        stmt = insert(ThreatMinHash).values(
+            threat_id=threat.id, signature=signature_to_bytes(signature), bands=bands
+        )
+        await self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[ThreatMinHash.threat_id],
+            set_={"signature": stmt.excluded.signature, "bands": stmt.excluded.bands},
+        ))
+
+        if duplicates:
+            await self.link_related(threat, duplicates)
+            logger.info(
+                f"Threat {threat.id} is a near-duplicate of "
+                f"{', '.join(f'{threat_id} ({similarity:.2f})' for threat_id, similarity in duplicates)}"
+            )
+        return duplicates
+
+    async def link_related(self, threat: Threat, duplicates: List[Tuple[int, float]]) -> None:
+        """Link both directions through related_threats and flag the new threat's metadata"""
+        duplicate_ids = [threat_id for threat_id, _ in duplicates]
+        # Lists are reassigned rather than mutated so the JSON columns are flagged dirty
+        threat.related_threats = _with_ids(threat.related_threats, duplicate_ids)
+        threat.extra_metadata = {
+            **(threat.extra_metadata or {}),
+            "near_duplicates": [
+                {"threat_id": threat_id, "similarity": round(similarity, 3)}
+                for threat_id, similarity in duplicates
+            ],
+        }
+        result = await self.db.execute(select(Threat).where(Threat.id.in_(duplicate_ids)))
+        for other in result.scalars():
+            other.related_threats = _with_ids(other.related_threats, [threat.id])
+
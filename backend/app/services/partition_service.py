@@ -0,0 +1,190 @@
+import asyncio
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import zstandard
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.cache import query_cache
+from app.db.compression import ZSTD_LEVEL
+from app.db.session import AsyncSessionLocal
+from app.services.analysis_service import ANALYSIS_CACHE, ANALYSIS_LIST_CACHE
+from app.services.threat_service import THREAT_CACHE, THREAT_LIST_CACHE
+
+# Tables range-partitioned by month on created_at
+PARTITIONED_TABLES = ("threat", "analysis")
+
+# Query cache namespaces that may hold rows of each table
+CACHE_NAMESPACES = {
+    "threat": (THREAT_LIST_CACHE, THREAT_CACHE),
+    "analysis": (ANALYSIS_LIST_CACHE, ANALYSIS_CACHE),
+}
+
+PARTITION_BOUND_RE = re.compile(r"FROM \((?:'([^']+)'|MINVALUE)\) TO \((?:'([^']+)'|MAXVALUE)\)")
+
+
+@dataclass
+class Partition:
+    """One partition of a range-partitioned table; None bounds are MINVALUE/MAXVALUE"""
+    name: str
+    start: Optional[datetime]
+    end: Optional[datetime]
+
+
+def month_start(day: date, months: int = 0) -> date:
+    """First day of the month `months` away from the month containing `day`"""
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table: str, start: date) -> str:
+    return f"{table}_y{start.year:04d}m{start.month:02d}"
+
+
+def retention_months(table: str) -> Optional[int]:
+    return {
+        "threat": settings.THREAT_RETENTION_MONTHS,
+        "analysis": settings.ANALYSIS_RETENTION_MONTHS,
+    }[table]
+
+
+class PartitionService:
+    """Creates monthly partitions ahead of time and archives expired ones"""
+
+    def __init__(self, db: AsyncSession):
+        """Initialize with database session"""
+        self.db = db
+
+    @staticmethod
+    def _check_table(table: str) -> None:
+        # Table names are interpolated into DDL, so only known tables are accepted
+        if table not in PARTITIONED_TABLES:
+            raise ValueError(f"{table!r} is not a partitioned table; expected one of {PARTITIONED_TABLES}")
+
+    async def list_partitions(self, table: str) -> List[Partition]:
+        """Partitions of `table`, oldest first"""
+        self._check_table(table)
+        result = await self.db.execute(
+            text(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:table AS regclass)"
+            ),
+            {"table": table},
+        )
+        partitions = []
+        for name, bound in result.all():
+            match = PARTITION_BOUND_RE.search(bound or "")
+            if not match:
+                continue
+            start, end = match.groups()
+            partitions.append(Partition(
+                name=name,
+                start=datetime.fromisoformat(start) if start else None,
+                end=datetime.fromisoformat(end) if end else None,
+            ))
+        return sorted(partitions, key=lambda p: p.start or datetime.min)
+
+    async def ensure_future_partitions(self, table: str, months_ahead: int) -> List[str]:
+        """
+        Create partitions for the current month and the next `months_ahead`
+        months, skipping ranges an existing partition already covers.
+        """
+        existing = await self.list_partitions(table)
+        this_month = month_start(datetime.utcnow().date())
+        created = []
+        for offset in range(months_ahead + 1):
+            start = month_start(this_month, offset)
+            end = month_start(this_month, offset + 1)
+            overlaps = any(
+                (p.start is None or p.start.date() < end) and (p.end is None or p.end.date() > start)
+                for p in existing
+            )
+            if overlaps:
+                continue
+            name = partition_name(table, start)
+            await self.db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            created.append(name)
+        await self.db.commit()
+        if created:
+            logger.info(f"Created {table} partitions: {', '.join(created)}")
+        return created
+
+    async def export_partition(self, partition: str, archive_dir: str) -> str:
+        """Stream a partition to <archive_dir>/<partition>.csv.zst with COPY and return the path"""
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{partition}.csv.zst")
+        tmp_path = f"{path}.tmp"
+
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        with open(tmp_path, "wb") as fh:
+            with zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(fh) as writer:
+                async def write_chunk(chunk: bytes) -> None:
+                    writer.write(chunk)
+
+                await raw.driver_connection.copy_from_table(partition, output=write_chunk, format="csv", header=True)
+        # Only a complete export replaces the final file
+        os.replace(tmp_path, path)
+        await self.db.commit()
+        return path
+
+    async def archive_expired_partitions(self, table: str, retention: int, archive_dir: str) -> List[str]:
+        """
+        Export and drop every partition whose range ends before the retention
+        window (the last `retention` whole months plus the current one).
+        """
+        cutoff = datetime.combine(month_start(datetime.utcnow().date(), -retention), datetime.min.time())
+        archived = []
+        for partition in await self.list_partitions(table):
+            if partition.end is None or partition.end > cutoff:
+                continue
+            path = await self.export_partition(partition.name, archive_dir)
+            await self.db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition.name}"))
+            if table == "threat":
+                # Tables keyed by threat_id have no FK to the partitioned table
+                for dependent in ("threat_ioc", "threat_fingerprint", "threat_minhash"):
+                    await self.db.execute(text(
+                        f"DELETE FROM {dependent} WHERE threat_id IN (SELECT id FROM {partition.name})"
+                    ))
+            await self.db.execute(text(f"DROP TABLE {partition.name}"))
+            await self.db.commit()
+            for namespace in CACHE_NAMESPACES[table]:
+                query_cache.invalidate(namespace)
+            logger.info(f"Archived partition {partition.name} to {path}")
+            archived.append(partition.name)
+        return archived
+
+    async def run_maintenance(self) -> Dict[str, Dict[str, List[str]]]:
+        """Create upcoming partitions and archive expired ones for every partitioned table"""
+        summary = {}
+        for table in PARTITIONED_TABLES:
+            created = await self.ensure_future_partitions(table, settings.PARTITION_MONTHS_AHEAD)
+            archived = []
+            retention = retention_months(table)
+            if retention is not None:
+                archived = await self.archive_expired_partitions(table, retention, settings.PARTITION_ARCHIVE_DIR)
+            summary[table] = {"created": created, "archived": archived}
+        return summary
+
+
+async def run_partition_maintenance() -> None:
+    """Background loop started with the API; runs maintenance once per interval"""
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await PartitionService(session).run_maintenance()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {str(e)}")
+        await asyncio.sleep(settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
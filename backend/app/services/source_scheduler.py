@@ -0,0 +1,311 @@
+"""
+Cron scheduler and per-type worker queues for source collection.
+
+Every SOURCE_SCHEDULER_REFRESH_SECONDS the scheduler re-reads the enabled
+sources that have a schedule (a cron expression, evaluated in UTC) and queues
+each one once its next fire time plus up to SOURCE_SCHEDULER_JITTER_SECONDS
+of random jitter has passed, so sources sharing a schedule do not all start
+in the same second. Fire times missed while the process was down or busy are
+coalesced into a single run, and a source still queued or running when it
+fires again is skipped instead of being queued twice. Manual triggers go
+through the same queues.
+
+Each SourceType has its own bounded queue served by its own workers
+(SOURCE_COLLECTION_CONCURRENCY), so slow dark-web collections cannot take the
+slots news sources need. A run hands an objective built from the source to
+the autonomous pipeline and records the outcome in last_collection_status.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from croniter import croniter
+from loguru import logger
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.source import Source, SourceType
+from app.services.analysis_service import iter_autonomous_threat_intel
+from app.services.source_service import SourceService
+
+# What queued a collection run
+SCHEDULED = "schedule"
+MANUAL = "manual"
+
+
+class CollectionQueueFullError(RuntimeError):
+    """Raised when a source is triggered while the collection queue for its type is full"""
+
+
+class ScheduledRun(NamedTuple):
+    """Next scheduled run of a source; due_at is fire_at plus jitter"""
+    source_type: SourceType
+    schedule: str
+    fire_at: datetime
+    due_at: datetime
+
+
+def next_fire_time(schedule: str, after: datetime) -> datetime:
+    """First fire time of a cron expression strictly after `after` (naive UTC)"""
+    return croniter(schedule, after).get_next(datetime)
+
+
+def collection_objective(source: Source) -> str:
+    """Objective for the autonomous pipeline: parameters["objective"], or one built from the source"""
+    parameters = source.parameters or {}
+    if parameters.get("objective"):
+        return parameters["objective"]
+    objective = f"Collect recent threat intelligence from {source.name} ({source.source_type.value} source)"
+    if source.url:
+        objective += f" at {source.url}"
+    return objective
+
+
+class SourceScheduler:
+    """Evaluates source schedules and runs collections on per-type worker pools"""
+
+    def __init__(
+        self,
+        enabled: bool,
+        refresh_interval: float,
+        jitter: float,
+        concurrency: Dict[str, int],
+        default_concurrency: int,
+        max_queued: int,
+    ):
+        self.enabled = enabled
+        self.refresh_interval = refresh_interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.default_concurrency = default_concurrency
+        self.max_queued = max_queued
+        self._queues: Dict[SourceType, "asyncio.Queue[Tuple[int, str]]"] = {}
+        self._workers: List[asyncio.Task] = []
+        self._scheduler: Optional[asyncio.Task] = None
+        self._plan: Dict[int, ScheduledRun] = {}
+        # Sources queued or running; a source is never queued twice
+        self._active: Set[int] = set()
+        # Source ID -> type of the collections running right now
+        self._running: Dict[int, SourceType] = {}
+        # (source ID, schedule) pairs already reported as invalid
+        self._invalid: Set[Tuple[int, str]] = set()
+        self.triggered = {SCHEDULED: 0, MANUAL: 0}
+        self.succeeded = 0
+        self.empty = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.skipped_busy = 0
+        self.skipped = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not worker.done() for worker in self._workers)
+
+    def workers_for(self, source_type: SourceType) -> int:
+        return max(1, self.concurrency.get(source_type.value, self.default_concurrency))
+
+    def start(self) -> None:
+        """Start the collection workers and, if enabled, the schedule loop"""
+        if self.running:
+            return
+        self._queues = {source_type: asyncio.Queue(maxsize=self.max_queued) for source_type in SourceType}
+        self._workers = [
+            asyncio.create_task(self._worker(source_type))
+            for source_type in SourceType
+            for _ in range(self.workers_for(source_type))
+        ]
+        if self.enabled:
+            self._scheduler = asyncio.create_task(self._run())
+
+    def trigger(self, source_id: int, source_type: SourceType, trigger: str = MANUAL) -> bool:
+        """
+        Queue a collection run for a source. Returns False if the source is
+        already queued or running; raises CollectionQueueFullError when the
+        queue for its type is full.
+        """
+        if not self._queues:
+            raise CollectionQueueFullError("Source collection queues are not running")
+        if source_id in self._active:
+            return False
+        try:
+            self._queues[source_type].put_nowait((source_id, trigger))
+        except asyncio.QueueFull:
+            raise CollectionQueueFullError(f"{self.max_queued} {source_type.value} collections are already queued")
+        self._active.add(source_id)
+        self.triggered[trigger] += 1
+        return True
+
+    async def stop(self) -> None:
+        """Stop the schedule loop and workers, cancelling running collections"""
+        interrupted = len(self._running)
+        tasks = [*self._workers, *([self._scheduler] if self._scheduler is not None else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._scheduler = None
+        self._queues = {}
+        self._active.clear()
+        self._running.clear()
+        if interrupted:
+            logger.info(f"Interrupted {interrupted} running source collections")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_refresh = loop.time()
+        while True:
+            if loop.time() >= next_refresh:
+                try:
+                    await self._refresh(datetime.utcnow())
+                except Exception as e:
+                    logger.error(f"Could not load source schedules: {e}")
+                next_refresh = loop.time() + self.refresh_interval
+            self._dispatch(datetime.utcnow())
+            delay = next_refresh - loop.time()
+            if self._plan:
+                earliest = min(run.due_at for run in self._plan.values())
+                delay = min(delay, (earliest - datetime.utcnow()).total_seconds())
+            # Cron resolution is a minute; never spin on a due time that just passed
+            await asyncio.sleep(max(delay, 1.0))
+
+    async def _refresh(self, now: datetime) -> None:
+        """Reload schedules, keeping the planned run of sources whose schedule did not change"""
+        async with AsyncSessionLocal() as session:
+            rows = await SourceService(session).get_scheduled_sources()
+        plan: Dict[int, ScheduledRun] = {}
+        for source_id, source_type, schedule, last_collection_status in rows:
+            current = self._plan.get(source_id)
+            if current is not None and current.schedule == schedule:
+                plan[source_id] = current._replace(source_type=source_type)
+                continue
+            if not croniter.is_valid(schedule):
+                if (source_id, schedule) not in self._invalid:
+                    self._invalid.add((source_id, schedule))
+                    logger.warning(f"Ignoring invalid schedule {schedule!r} of source {source_id}")
+                continue
+            # Counting from the last run makes a fire time missed while no
+            # scheduler was running due at once (a single coalesced run)
+            fire_at = next_fire_time(schedule, self._last_started_at(last_collection_status) or now)
+            plan[source_id] = ScheduledRun(source_type, schedule, fire_at, self._jittered(fire_at))
+        self._plan = plan
+
+    def _dispatch(self, now: datetime) -> None:
+        """Queue the sources whose due time has passed and plan their next run"""
+        for source_id, run in list(self._plan.items()):
+            if run.due_at > now:
+                continue
+            if next_fire_time(run.schedule, run.fire_at) <= now:
+                # Later fire times passed as well; they collapse into this run
+                self.coalesced += 1
+            fire_at = next_fire_time(run.schedule, now)
+            self._plan[source_id] = run._replace(fire_at=fire_at, due_at=self._jittered(fire_at))
+            try:
+                queued = self.trigger(source_id, run.source_type, SCHEDULED)
+            except CollectionQueueFullError as e:
+                self.dropped += 1
+                logger.warning(f"Skipping scheduled collection of source {source_id}: {e}")
+                continue
+            if not queued:
+                self.skipped_busy += 1
+                logger.info(f"Skipping scheduled collection of source {source_id}: previous run still in progress")
+
+    def _jittered(self, fire_at: datetime) -> datetime:
+        return fire_at + timedelta(seconds=random.uniform(0, self.jitter))
+
+    @staticmethod
+    def _last_started_at(last_collection_status: Optional[Dict[str, Any]]) -> Optional[datetime]:
+        try:
+            return datetime.fromisoformat(last_collection_status["started_at"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    async def _worker(self, source_type: SourceType) -> None:
+        queue = self._queues[source_type]
+        while True:
+            source_id, trigger = await queue.get()
+            try:
+                await self._collect(source_id, trigger)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Collection of source {source_id} crashed: {e}")
+            finally:
+                self._active.discard(source_id)
+                self._running.pop(source_id, None)
+
+    async def _collect(self, source_id: int, trigger: str) -> None:
+        """Run one collection and record its outcome on the source"""
+        async with AsyncSessionLocal() as session:
+            source = await SourceService(session).get_source(str(source_id))
+        # Sources deleted or disabled since they were queued; manual runs ignore enabled
+        if source is None or (trigger == SCHEDULED and not source.enabled):
+            self.skipped += 1
+            return
+
+        self._running[source_id] = source.source_type
+        started_at = datetime.utcnow()
+        # The pipeline stores its analysis through its own session; none is held while it runs
+        results = [result async for result in iter_autonomous_threat_intel([collection_objective(source)], 1)]
+        finished_at = datetime.utcnow()
+
+        collection_status: Dict[str, Any] = {
+            "trigger": trigger,
+            "started_at": started_at.isoformat(),
+            "finished_at": finished_at.isoformat(),
+            "duration_seconds": round((finished_at - started_at).total_seconds(), 3),
+        }
+        if not results:
+            collection_status["status"] = "empty"
+            self.empty += 1
+        elif "error" in results[0]:
+            collection_status.update(status="failed", error=results[0]["error"])
+            self.failed += 1
+        else:
+            collection_status.update(status="succeeded", analysis_id=results[0]["db_id"])
+            self.succeeded += 1
+
+        async with AsyncSessionLocal() as session:
+            await SourceService(session).record_collection(source_id, collection_status)
+        logger.info(f"Collection of source {source_id} ({trigger}) {collection_status['status']}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Scheduled sources, per-type occupancy and cumulative counters"""
+        due = min((run.due_at for run in self._plan.values()), default=None)
+        running_by_type: Dict[SourceType, int] = {}
+        for source_type in self._running.values():
+            running_by_type[source_type] = running_by_type.get(source_type, 0) + 1
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "scheduled_sources": len(self._plan),
+            "next_due_at": due.isoformat() if due is not None else None,
+            "types": {
+                source_type.value: {
+                    "workers": self.workers_for(source_type),
+                    "busy": running_by_type.get(source_type, 0),
+                    "queued": self._queues[source_type].qsize() if self._queues else 0,
+                }
+                for source_type in SourceType
+            },
+            "max_queued": self.max_queued,
+            "triggered": dict(self.triggered),
+            "succeeded": self.succeeded,
+            "empty": self.empty,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "skipped_busy": self.skipped_busy,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+        }
+
+
+# Started and stopped by the API's startup/shutdown hooks
+source_scheduler = SourceScheduler(
+    enabled=settings.SOURCE_SCHEDULER_ENABLED,
+    refresh_interval=settings.SOURCE_SCHEDULER_REFRESH_SECONDS,
+    jitter=settings.SOURCE_SCHEDULER_JITTER_SECONDS,
+    concurrency=settings.SOURCE_COLLECTION_CONCURRENCY,
+    default_concurrency=settings.SOURCE_COLLECTION_DEFAULT_CONCURRENCY,
+    max_queued=settings.SOURCE_COLLECTION_QUEUE_MAX_SIZE,
+)
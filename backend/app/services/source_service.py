@@ -1,10 +1,40 @@
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 import uuid
-from sqlalchemy import select
+from sqlalchemy import Select, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.source import Source
-from app.schemas.source import SourceCreate, SourceUpdate
+from app.db.cache import cache_key, detach, query_cache
+from app.db.filters import any_of, apply_containment
+from app.db.pagination import paginate
+from app.db.projection import load_columns
+from app.models.source import Source, SourceType
+from app.models.threat import Threat
+from app.schemas.source import SourceBulkChanges, SourceCreate, SourceFilter, SourceUpdate
+from app.services.threat_service import invalidate_threat_cache
+
+
+# Query cache namespaces: list pages, and single sources by ID
+SOURCE_LIST_CACHE = "sources"
+SOURCE_CACHE = "source"
+
+
+def source_values(source_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map schema values onto Source column values"""
+    values = dict(source_data)
+    if values.get("url") is not None:
+        values["url"] = str(values["url"])
+    return values
+
+
+def invalidate_source_cache(*source_ids: Any) -> None:
+    """Drop cached source list pages, and the cached rows of the given sources"""
+    query_cache.invalidate(SOURCE_LIST_CACHE)
+    if source_ids:
+        query_cache.invalidate(
+            SOURCE_CACHE,
+            *(cache_key(str(source_id), "row") for source_id in source_ids),
+        )
 
 
 class SourceService:
@@ -20,70 +50,213 @@ class SourceService:
         limit: int = 100,
         source_type: Optional[str] = None,
         enabled: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+        version: Optional[Tuple[Optional[datetime], int]] = None,
     ) -> List[Source]:
-        """Get list of sources with optional filtering"""
-        query = select(Source).offset(skip).limit(limit)
-        
-        # Apply filters if provided
+        """
+        Get list of sources with optional filtering, newest first.
+        `columns` restricts the SELECT to those attributes. Pages may come
+        from the query cache; `version` (see get_sources_version) is part of
+        the key.
+        """
+        async def load() -> List[Source]:
+            query = paginate(select(Source), Source, cursor, limit, skip=skip)
+            if columns:
+                query = query.options(load_columns(Source, columns))
+            query = self._apply_filters(query, source_type=source_type, enabled=enabled, parameters=parameters)
+
+            result = await self.db.execute(query)
+            sources = result.scalars().all()
+            detach(self.db, sources)
+            return sources
+
+        key = cache_key(
+            "page",
+            skip=skip,
+            limit=limit,
+            source_type=source_type,
+            enabled=enabled,
+            cursor=cursor,
+            parameters=parameters,
+            columns=columns,
+            version=version,
+        )
+        return await query_cache.get_or_load(SOURCE_LIST_CACHE, key, load)
+
+    @staticmethod
+    def _apply_filters(
+        query: Select,
+        source_type: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+    ) -> Select:
+        query = apply_containment(query, Source.parameters, parameters)
         if source_type:
             query = query.filter(Source.source_type == source_type)
-        
         if enabled is not None:
             query = query.filter(Source.enabled == enabled)
-        
-        result = await self.db.execute(query)
-        return result.scalars().all()
-    
-    async def get_source(self, source_id: str) -> Optional[Source]:
-        """Get a specific source by ID"""
-        query = select(Source).filter(Source.id == source_id)
-        result = await self.db.execute(query)
+        return query
+
+    async def get_sources_version(self, **filters: Any) -> Tuple[Optional[datetime], int]:
+        """Newest updated_at and row count of the sources matching the list filters (uncached)"""
+        query = select(func.max(Source.updated_at), func.count()).select_from(Source)
+        row = (await self.db.execute(self._apply_filters(query, **filters))).one()
+        return row[0], row[1]
+
+    async def get_source_updated_at(self, source_id: str) -> Optional[datetime]:
+        """updated_at of one source, without loading the row"""
+        result = await self.db.execute(select(Source.updated_at).filter(Source.id == source_id))
         return result.scalar_one_or_none()
     
+    async def get_source(self, source_id: str, updated_at: Optional[datetime] = None) -> Optional[Source]:
+        """
+        Get a specific source by ID. The row may come from the query cache and
+        is detached: treat it as read-only. A cached row whose updated_at is
+        not `updated_at` is reloaded.
+        """
+        async def load() -> Optional[Source]:
+            query = select(Source).filter(Source.id == source_id)
+            result = await self.db.execute(query)
+            source = result.scalar_one_or_none()
+            detach(self.db, [source])
+            return source
+
+        key = cache_key(str(source_id), "row")
+        source = await query_cache.get_or_load(SOURCE_CACHE, key, load)
+        if updated_at is not None and source is not None and source.updated_at != updated_at:
+            # Cached before a write in another process; reload to match the fresh version
+            query_cache.invalidate(SOURCE_CACHE, key)
+            source = await query_cache.get_or_load(SOURCE_CACHE, key, load)
+        return source
+    
     async def create_source(self, source_data: SourceCreate) -> Source:
         """Create a new data source"""
         # Convert Pydantic model to dict, excluding None values
         source_dict = source_data.model_dump(exclude_none=True)
         
         # Create new source object
-        db_source = Source(**source_dict)
+        db_source = Source(**source_values(source_dict))
         
         # Add to database
         self.db.add(db_source)
         await self.db.commit()
+        invalidate_source_cache(db_source.id)
         await self.db.refresh(db_source)
         
         return db_source
     
-    async def update_source(self, source_id: str, source_data: SourceUpdate) -> Optional[Source]:
-        """Update an existing data source"""
-        # Get existing source
-        db_source = await self.get_source(source_id)
-        if not db_source:
-            return None
-        
+    async def update_source(self, source_id: int, source_data: SourceUpdate) -> Optional[Source]:
+        """
+        Update an existing data source with a single UPDATE ... RETURNING.
+        Returns None if it does not exist.
+        """
         # Convert Pydantic model to dict, excluding None values
-        update_data = source_data.model_dump(exclude_none=True)
-        
-        # Update source attributes
-        for key, value in update_data.items():
-            setattr(db_source, key, value)
-        
-        # Save changes
+        values = source_values(source_data.model_dump(exclude_none=True))
+        values["updated_at"] = datetime.utcnow()
+
+        result = await self.db.execute(
+            update(Source).where(Source.id == source_id).values(**values).returning(Source),
+            execution_options={"synchronize_session": False},
+        )
+        db_source = result.scalar_one_or_none()
+        if db_source is None:
+            return None
+
         await self.db.commit()
-        await self.db.refresh(db_source)
-        
+        invalidate_source_cache(db_source.id)
         return db_source
     
-    async def delete_source(self, source_id: str) -> bool:
-        """Delete a data source"""
-        # Get existing source
-        db_source = await self.get_source(source_id)
-        if not db_source:
+    async def delete_source(self, source_id: int) -> bool:
+        """Delete a data source with a single DELETE ... RETURNING; False if it does not exist"""
+        threat_ids = await self._unlink_threats(select(Source.id).where(Source.id == source_id))
+        result = await self.db.execute(
+            delete(Source).where(Source.id == source_id).returning(Source.id),
+            execution_options={"synchronize_session": False},
+        )
+        deleted_id = result.scalar_one_or_none()
+        if deleted_id is None:
             return False
-        
-        # Delete source
-        await self.db.delete(db_source)
+
         await self.db.commit()
-        
+        invalidate_source_cache(deleted_id)
+        if threat_ids:
+            invalidate_threat_cache(*threat_ids)
         return True
+
+    async def get_scheduled_sources(self) -> List[Tuple[int, SourceType, str, Optional[Dict[str, Any]]]]:
+        """(id, source_type, schedule, last_collection_status) of every enabled source with a schedule"""
+        result = await self.db.execute(
+            select(Source.id, Source.source_type, Source.schedule, Source.last_collection_status)
+            .where(Source.enabled.is_(True), Source.schedule.is_not(None))
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def record_collection(self, source_id: int, collection_status: Dict[str, Any]) -> None:
+        """Store the outcome of a collection run as the source's last_collection_status"""
+        await self.db.execute(
+            update(Source)
+            .where(Source.id == source_id)
+            .values(last_collection_status=collection_status, updated_at=datetime.utcnow()),
+            execution_options={"synchronize_session": False},
+        )
+        await self.db.commit()
+        invalidate_source_cache(source_id)
+
+    def _filter_statement(self, stmt: Any, source_filter: SourceFilter) -> Any:
+        """Apply a bulk operation's filter; refuses an empty one, which would match every source"""
+        conditions = source_filter.model_dump(exclude_none=True)
+        if not conditions:
+            raise ValueError("At least one filter condition is required")
+        source_ids = conditions.pop("ids", None)
+        if source_ids is not None:
+            stmt = stmt.where(any_of(Source.id, source_ids))
+        return self._apply_filters(stmt, **conditions)
+
+    async def bulk_update_sources(self, source_filter: SourceFilter, changes: SourceBulkChanges) -> int:
+        """Apply `changes` to every source matching `source_filter` in one UPDATE and return how many were updated"""
+        values = changes.model_dump(exclude_none=True)
+        if not values:
+            raise ValueError("At least one value to update is required")
+        values["updated_at"] = datetime.utcnow()
+
+        stmt = self._filter_statement(update(Source), source_filter)
+        result = await self.db.execute(
+            stmt.values(**values).returning(Source.id),
+            execution_options={"synchronize_session": False},
+        )
+        source_ids = result.scalars().all()
+        await self.db.commit()
+        invalidate_source_cache(*source_ids)
+        return len(source_ids)
+
+    async def bulk_delete_sources(self, source_filter: SourceFilter) -> int:
+        """Delete every source matching `source_filter` in one DELETE and return how many were deleted"""
+        threat_ids = await self._unlink_threats(self._filter_statement(select(Source.id), source_filter))
+        stmt = self._filter_statement(delete(Source), source_filter)
+        result = await self.db.execute(
+            stmt.returning(Source.id),
+            execution_options={"synchronize_session": False},
+        )
+        source_ids = result.scalars().all()
+        await self.db.commit()
+        invalidate_source_cache(*source_ids)
+        if threat_ids:
+            invalidate_threat_cache(*threat_ids)
+        return len(source_ids)
+
+    async def _unlink_threats(self, source_ids: Select) -> List[int]:
+        """
+        Clear source_id on the threats of sources about to be deleted, as
+        deleting through the ORM relationship did, so the FK does not block
+        the DELETE. Returns the IDs of the threats changed.
+        """
+        result = await self.db.execute(
+            update(Threat)
+            .where(Threat.source_id.in_(source_ids.scalar_subquery()))
+            .values(source_id=None, updated_at=datetime.utcnow())
+            .returning(Threat.id),
+            execution_options={"synchronize_session": False},
+        )
+        return result.scalars().all()
@@ -1,10 +1,99 @@
-from typing import List, Optional, Dict, Any
+import hashlib
+import json
+import re
+from datetime import datetime
+from typing import List, Optional, Dict, Any, AsyncIterable, AsyncIterator, Sequence, Tuple
 import uuid
-from sqlalchemy import select
+from pydantic import ValidationError
+from sqlalchemy import Select, select, insert, update, delete, func, literal, literal_column
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+from loguru import logger
 
-from app.models.threat import Threat
-from app.schemas.threat import ThreatCreate, ThreatUpdate
+from app.core.config import settings
+from app.db.cache import cache_key, detach, query_cache
+from app.db.filters import any_of, apply_containment, apply_time_range
+from app.db.pagination import paginate
+from app.db.projection import load_columns
+from app.models.ioc import ThreatIOC
+from app.models.threat import Threat, ThreatFingerprint, ThreatMinHash, THREAT_SEARCH_CONFIG
+from app.schemas.threat import (
+    ThreatBulkChanges,
+    ThreatBulkError,
+    ThreatBulkResult,
+    ThreatCreate,
+    ThreatFilter,
+    ThreatUpdate,
+)
+from app.services.ioc_service import IOCService, normalize_ioc
+from app.services.near_duplicate_service import NearDuplicateService
+
+# Query cache namespaces: list pages, and single threats by ID
+THREAT_LIST_CACHE = "threats"
+THREAT_CACHE = "threat"
+
+
+def threat_values(threat_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map schema field names onto Threat column attributes"""
+    values = dict(threat_data)
+    if "metadata" in values:
+        values["extra_metadata"] = values.pop("metadata")
+    if values.get("source_id") is not None:
+        values["source_id"] = int(values["source_id"])
+    if "raw_content" in values:
+        values.update(Threat.raw_content_values(values.pop("raw_content")))
+    return values
+
+
+def threat_fingerprint(title: str, threat_type: Any, iocs: Optional[List[Dict[str, Any]]]) -> str:
+    """
+    Deterministic content fingerprint: normalized title, sorted normalized IOC
+    set and threat type. Re-synthesizing the same threat yields the same value.
+    """
+    norm_title = " ".join(re.findall(r"\w+", (title or "").lower()))
+    pairs = sorted({
+        pair for ioc in iocs or []
+        if isinstance(ioc, dict) and (pair := normalize_ioc(ioc.get("type"), ioc.get("value")))
+    })
+    norm_type = getattr(threat_type, "value", threat_type) or ""
+    payload = json.dumps([norm_title, [list(pair) for pair in pairs], str(norm_type)], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def merge_iocs(existing: Optional[List[Dict[str, Any]]], new: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Union of two IOC lists keyed by normalized (type, value), keeping the highest confidence"""
+    merged: Dict[Any, Dict[str, Any]] = {}
+    for ioc in (existing or []) + (new or []):
+        if not isinstance(ioc, dict):
+            continue
+        key = normalize_ioc(ioc.get("type"), ioc.get("value")) or json.dumps(ioc, sort_keys=True)
+        current = merged.get(key)
+        if current is None or (ioc.get("confidence") or 0.0) > (current.get("confidence") or 0.0):
+            merged[key] = ioc
+    return list(merged.values())
+
+
+def merge_ttps(existing: Optional[List[Dict[str, Any]]], new: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Union of two TTP lists keyed by MITRE ID (or technique when there is none)"""
+    merged: Dict[Any, Dict[str, Any]] = {}
+    for ttp in (existing or []) + (new or []):
+        if not isinstance(ttp, dict):
+            continue
+        key = ttp.get("mitre_id") or ttp.get("technique") or json.dumps(ttp, sort_keys=True)
+        merged.setdefault(str(key).strip().upper(), ttp)
+    return list(merged.values())
+
+
+def invalidate_threat_cache(*threat_ids: Any) -> None:
+    """Drop cached threat list pages, and the cached rows of the given threats"""
+    query_cache.invalidate(THREAT_LIST_CACHE)
+    if threat_ids:
+        query_cache.invalidate(
+            THREAT_CACHE,
+            *(cache_key(str(threat_id), "row") for threat_id in threat_ids),
+        )
 
 
 class ThreatService:
@@ -13,6 +102,33 @@ class ThreatService:
     def __init__(self, db: AsyncSession):
         """Initialize with database session"""
         self.db = db
+
+    @staticmethod
+    def _apply_filters(
+        query: Select,
+        severity: Optional[str] = None,
+        threat_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        ttp: Optional[str] = None,
+        ioc: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Select:
+        """Filters shared by the threat list and the export"""
+        query = apply_time_range(query, Threat.created_at, since, until)
+
+        # JSONB containment filters, served by the GIN (jsonb_path_ops) indexes
+        if ttp:
+            query = apply_containment(query, Threat.ttps, [{"mitre_id": ttp}])
+        if ioc:
+            query = apply_containment(query, Threat.iocs, [{"value": ioc}])
+        query = apply_containment(query, Threat.extra_metadata, metadata)
+
+        if severity:
+            query = query.filter(Threat.severity == severity)
+        if threat_type:
+            query = query.filter(Threat.threat_type == threat_type)
+        return query
     
     async def get_threats(
         self, 
@@ -20,72 +136,456 @@ class ThreatService:
         limit: int = 100,
         severity: Optional[str] = None,
         source_type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        threat_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        ttp: Optional[str] = None,
+        ioc: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        include_raw_content: bool = False,
+        columns: Optional[Sequence[str]] = None,
+        version: Optional[Tuple[Optional[datetime], int]] = None,
     ) -> List[Threat]:
-        """Get list of threats with optional filtering"""
-        query = select(Threat).offset(skip).limit(limit)
-        
-        # Apply filters if provided
+        """
+        Get list of threats with optional filtering, newest first.
+        Raw content is only loaded when include_raw_content is set; `columns`
+        restricts the SELECT to those attributes instead. Pages may come from
+        the query cache, keyed by `version` (from get_threats_version) so a
+        page cached before another worker's write is not served under a
+        newer ETag.
+        """
+        async def load() -> List[Threat]:
+            query = paginate(select(Threat), Threat, cursor, limit, skip=skip)
+            if columns:
+                query = query.options(load_columns(Threat, columns))
+            elif include_raw_content:
+                query = query.options(undefer(Threat.raw_content_zstd))
+            query = self._apply_filters(
+                query,
+                severity=severity,
+                threat_type=threat_type,
+                since=since,
+                until=until,
+                ttp=ttp,
+                ioc=ioc,
+                metadata=metadata,
+            )
+
+            if source_type:
+                # This would need to join with the source table
+                # For simplicity, we're not implementing this filter yet
+                pass
+
+            result = await self.db.execute(query)
+            threats = result.scalars().all()
+            detach(self.db, threats)
+            return threats
+
+        key = cache_key(
+            "page",
+            skip=skip,
+            limit=limit,
+            severity=severity,
+            source_type=source_type,
+            cursor=cursor,
+            threat_type=threat_type,
+            since=since,
+            until=until,
+            ttp=ttp,
+            ioc=ioc,
+            metadata=metadata,
+            include_raw_content=include_raw_content,
+            columns=columns,
+            version=version,
+        )
+        return await query_cache.get_or_load(THREAT_LIST_CACHE, key, load)
+
+    async def get_threats_version(self, **filters: Any) -> Tuple[Optional[datetime], int]:
+        """
+        Newest updated_at and row count of the threats matching the list
+        filters. Any insert, update or delete that could change a page changes
+        one of the two, so together they validate cached list responses.
+        Never cached: the query cache is per process, so a cached version
+        could confirm a page another worker has since changed.
+        """
+        query = select(func.max(Threat.updated_at), func.count()).select_from(Threat)
+        row = (await self.db.execute(self._apply_filters(query, **filters))).one()
+        return row[0], row[1]
+
+    async def get_threat_updated_at(self, threat_id: int) -> Optional[datetime]:
+        """updated_at of one threat, without loading the row"""
+        result = await self.db.execute(select(Threat.updated_at).filter(Threat.id == threat_id))
+        return result.scalar_one_or_none()
+
+    async def stream_threats(
+        self,
+        columns: Sequence[str],
+        batch_size: int = 1000,
+        **filters: Any,
+    ) -> AsyncIterator[List[Threat]]:
+        """
+        Yield every matching threat, newest first, in batches of `batch_size`.
+        Rows come from a server-side cursor, so memory stays flat however
+        many rows match. Accepts the same filters as get_threats.
+        """
+        query = self._apply_filters(select(Threat), **filters)
+        query = (
+            query.options(load_columns(Threat, columns))
+            .order_by(Threat.created_at.desc(), Threat.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream_scalars(query)
+        async for batch in result.partitions():
+            yield batch
+    
+    async def search_threats(
+        self,
+        q: str,
+        skip: int = 0,
+        limit: int = 20,
+        severity: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tuple[Threat, float, Optional[str]]]:
+        """
+        Full-text search over title, description and the raw content prefix.
+        Returns (threat, rank, snippet) tuples, best match first. Matching runs
+        on the GIN-indexed search vector; snippets are only generated for the
+        page of hits being returned.
+        """
+        config = literal_column(f"'{THREAT_SEARCH_CONFIG}'::regconfig")
+        tsquery = func.websearch_to_tsquery(config, q)
+        rank = func.ts_rank_cd(Threat.search_vector, tsquery).label("rank")
+
+        hits = select(Threat.id, rank).where(Threat.search_vector.op("@@")(tsquery))
+        hits = apply_time_range(hits, Threat.created_at, since, until)
         if severity:
-            query = query.filter(Threat.severity == severity)
-        
-        if source_type:
-            # This would need to join with the source table
-            # For simplicity, we're not implementing this filter yet
-            pass
-        
+            hits = hits.where(Threat.severity == severity)
+        hits = hits.order_by(rank.desc(), Threat.id.desc()).offset(skip).limit(limit).subquery()
+
+        snippet = func.ts_headline(
+            config,
+            func.coalesce(Threat.description, Threat.title),
+            tsquery,
+            "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2",
+        )
+        query = (
+            select(Threat, hits.c.rank, snippet)
+            .join(hits, hits.c.id == Threat.id)
+            .order_by(hits.c.rank.desc(), Threat.id.desc())
+        )
         result = await self.db.execute(query)
-        return result.scalars().all()
-    
-    async def get_threat(self, threat_id: str) -> Optional[Threat]:
-        """Get a specific threat by ID"""
-        query = select(Threat).filter(Threat.id == threat_id)
+        return [(threat, rank, snippet) for threat, rank, snippet in result.all()]
+
+    async def get_threat(self, threat_id: str, updated_at: Optional[datetime] = None) -> Optional[Threat]:
+        """
+        Get a specific threat by ID, including its raw content. The row may
+        come from the query cache and is detached: treat it as read-only.
+        With `updated_at` (from get_threat_updated_at), a cached row older
+        than that is reloaded.
+        """
+        async def load() -> Optional[Threat]:
+            query = select(Threat).options(undefer(Threat.raw_content_zstd)).filter(Threat.id == threat_id)
+            result = await self.db.execute(query)
+            threat = result.scalar_one_or_none()
+            detach(self.db, [threat])
+            return threat
+
+        key = cache_key(str(threat_id), "row")
+        threat = await query_cache.get_or_load(THREAT_CACHE, key, load)
+        if updated_at is not None and threat is not None and threat.updated_at != updated_at:
+            # Cached before a write in another process; reload to match the fresh version
+            query_cache.invalidate(THREAT_CACHE, key)
+            threat = await query_cache.get_or_load(THREAT_CACHE, key, load)
+        return threat
+
+    async def get_threats_by_ids(
+        self,
+        threat_ids: Sequence[int],
+        include_raw_content: bool = False,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Dict[int, Threat]:
+        """
+        Threats with the given IDs, keyed by ID; IDs that do not exist are
+        absent. One query binds the IDs as a single array parameter
+        (id = ANY(:ids)), so its plan does not depend on how many are asked for.
+        """
+        if not threat_ids:
+            return {}
+        query = select(Threat).where(any_of(Threat.id, threat_ids))
+        if columns:
+            query = query.options(load_columns(Threat, columns))
+        elif include_raw_content:
+            query = query.options(undefer(Threat.raw_content_zstd))
         result = await self.db.execute(query)
-        return result.scalar_one_or_none()
-    
+        return {threat.id: threat for threat in result.scalars()}
+
     async def create_threat(self, threat_data: ThreatCreate) -> Threat:
         """Create a new threat"""
         # Convert Pydantic model to dict, excluding None values
         threat_dict = threat_data.model_dump(exclude_none=True)
         
         # Create new threat object
-        db_threat = Threat(**threat_dict)
+        db_threat = Threat(**threat_values(threat_dict))
         
-        # Add to database
+        # Add to database, writing IOCs through to the normalized index
         self.db.add(db_threat)
+        await self.db.flush()
+        await IOCService(self.db).link_threat_iocs(db_threat.id, db_threat.iocs)
         await self.db.commit()
+        invalidate_threat_cache(db_threat.id)
         await self.db.refresh(db_threat)
         
         return db_threat
     
-    async def update_threat(self, threat_id: str, threat_data: ThreatUpdate) -> Optional[Threat]:
-        """Update an existing threat"""
-        # Get existing threat
-        db_threat = await self.get_threat(threat_id)
-        if not db_threat:
-            return None
-        
+    async def upsert_threat(self, threat_data: ThreatCreate) -> Tuple[Threat, bool]:
+        """
+        Insert a threat, or merge it into the threat with the same content
+        fingerprint: IOCs and TTPs are unioned and the sightings counter bumped.
+        New threats are linked to near-duplicate reports via related_threats.
+        Returns the threat and whether it was newly created.
+        """
+        db_threat, created, touched = await self._upsert(threat_data)
+        await self.db.commit()
+        invalidate_threat_cache(*touched)
+        await self.db.refresh(db_threat)
+        return db_threat, created
+
+    async def upsert_threats(self, items: Sequence[ThreatCreate]) -> List[Optional[Tuple[Threat, bool]]]:
+        """
+        upsert_threat for a batch in one transaction, so the commit is paid
+        once per batch. Each item runs in a savepoint: an item that fails is
+        rolled back alone and reported as None, in input order.
+        """
+        outcomes: List[Optional[Tuple[Threat, bool]]] = []
+        touched: List[int] = []
+        for threat_data in items:
+            try:
+                async with self.db.begin_nested():
+                    db_threat, created, threat_ids = await self._upsert(threat_data)
+            except Exception as e:
+                logger.error(f"Failed to upsert threat {threat_data.title!r}: {e}")
+                outcomes.append(None)
+                continue
+            outcomes.append((db_threat, created))
+            touched.extend(threat_ids)
+        await self.db.commit()
+        invalidate_threat_cache(*touched)
+        return outcomes
+
+    async def _upsert(self, threat_data: ThreatCreate) -> Tuple[Threat, bool, List[int]]:
+        """
+        The statements of upsert_threat, without committing. Also returns the
+        IDs of every threat changed, for cache invalidation after the commit.
+        """
+        values = threat_values(threat_data.model_dump(exclude_none=True))
+        fingerprint = threat_fingerprint(values.get("title"), values.get("threat_type"), values.get("iocs"))
+
+        # The conflicting row stays locked until commit, so concurrent sightings
+        # of one fingerprint are applied one after another
+        stmt = pg_insert(ThreatFingerprint).values(fingerprint=fingerprint)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ThreatFingerprint.fingerprint],
+            set_={"updated_at": datetime.utcnow()},
+        ).returning(ThreatFingerprint.id, ThreatFingerprint.threat_id, ThreatFingerprint.threat_created_at)
+        entry = (await self.db.execute(stmt)).one()
+
+        db_threat = None
+        duplicates: List[Tuple[int, float]] = []
+        if entry.threat_id is not None:
+            result = await self.db.execute(
+                select(Threat).where(Threat.id == entry.threat_id, Threat.created_at == entry.threat_created_at)
+            )
+            db_threat = result.scalar_one_or_none()
+
+        if db_threat is None:
+            # First sighting, or the earlier threat was deleted or archived
+            db_threat = Threat(**values)
+            self.db.add(db_threat)
+            await self.db.flush()
+            await self.db.execute(
+                update(ThreatFingerprint)
+                .where(ThreatFingerprint.id == entry.id)
+                .values(threat_id=db_threat.id, threat_created_at=db_threat.created_at)
+            )
+            await IOCService(self.db).link_threat_iocs(db_threat.id, db_threat.iocs)
+            duplicates = await NearDuplicateService(self.db).index_threat(db_threat)
+            created = True
+        else:
+            db_threat.iocs = merge_iocs(db_threat.iocs, values.get("iocs"))
+            db_threat.ttps = merge_ttps(db_threat.ttps, values.get("ttps"))
+            db_threat.sightings = (db_threat.sightings or 1) + 1
+            db_threat.last_seen_at = datetime.utcnow()
+            await IOCService(self.db).link_threat_iocs(db_threat.id, values.get("iocs"))
+            created = False
+
+        # Near-duplicates gained a related_threats entry
+        return db_threat, created, [db_threat.id, *(threat_id for threat_id, _ in duplicates)]
+
+    async def create_threats_bulk(
+        self,
+        items: AsyncIterable[Any],
+        chunk_size: Optional[int] = None,
+    ) -> ThreatBulkResult:
+        """
+        Validate and insert threats in chunks.
+        Each chunk is validated against ThreatCreate and inserted with one
+        multi-row INSERT ... RETURNING, its IOCs written through in bulk, and
+        committed on its own; invalid items are reported, not fatal.
+        Items that are Exception instances (e.g. unparseable NDJSON lines) are
+        reported as errors.
+        """
+        chunk_size = chunk_size or settings.BULK_INSERT_CHUNK_SIZE
+        outcome = ThreatBulkResult()
+        chunk: List[tuple] = []
+        index = 0
+        async for item in items:
+            if isinstance(item, Exception):
+                outcome.errors.append(ThreatBulkError(index=index, error=str(item)))
+            else:
+                try:
+                    chunk.append((index, ThreatCreate.model_validate(item)))
+                except ValidationError as e:
+                    outcome.errors.append(ThreatBulkError(index=index, error=str(e)))
+            index += 1
+            if len(chunk) >= chunk_size:
+                await self._insert_threat_chunk(chunk, outcome)
+                chunk = []
+        if chunk:
+            await self._insert_threat_chunk(chunk, outcome)
+
+        outcome.errors.sort(key=lambda error: error.index)
+        outcome.failed = len(outcome.errors)
+        return outcome
+
+    async def _insert_threat_chunk(self, chunk: List[tuple], outcome: ThreatBulkResult) -> None:
+        """Insert one validated chunk of (index, ThreatCreate) pairs"""
+        rows = []
+        for _, threat_data in chunk:
+            row = threat_values(threat_data.model_dump())
+            # Every row must carry the same keys; mirror the column defaults for omitted lists
+            for key in ("iocs", "ttps", "related_threats"):
+                row[key] = row[key] or []
+            row["extra_metadata"] = row["extra_metadata"] or {}
+            rows.append(row)
+
+        try:
+            result = await self.db.execute(
+                insert(Threat).returning(Threat.id, sort_by_parameter_order=True),
+                rows,
+            )
+            threat_ids = result.scalars().all()
+            await IOCService(self.db).link_threats_iocs(
+                {threat_id: row["iocs"] for threat_id, row in zip(threat_ids, rows)}
+            )
+            await self.db.commit()
+            invalidate_threat_cache(*threat_ids)
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Bulk threat insert failed for {len(chunk)} items: {e}")
+            outcome.errors.extend(
+                ThreatBulkError(index=index, error=f"Database error: {e.__class__.__name__}")
+                for index, _ in chunk
+            )
+            return
+
+        outcome.created += len(threat_ids)
+        outcome.ids.extend(str(threat_id) for threat_id in threat_ids)
+
+    async def update_threat(self, threat_id: int, threat_data: ThreatUpdate) -> Optional[Threat]:
+        """
+        Update an existing threat with a single UPDATE ... RETURNING, without
+        loading it first or refreshing it after. Returns None if it does not exist.
+        """
         # Convert Pydantic model to dict, excluding None values
         update_data = threat_data.model_dump(exclude_none=True)
-        
-        # Update threat attributes
-        for key, value in update_data.items():
-            setattr(db_threat, key, value)
-        
-        # Save changes
+        values = threat_values(update_data)
+        values["updated_at"] = datetime.utcnow()
+
+        result = await self.db.execute(
+            update(Threat).where(Threat.id == threat_id).values(**values).returning(Threat),
+            execution_options={"synchronize_session": False},
+        )
+        db_threat = result.scalar_one_or_none()
+        if db_threat is None:
+            return None
+
+        if "iocs" in update_data:
+            await IOCService(self.db).link_threat_iocs(db_threat.id, db_threat.iocs, replace=True)
+
         await self.db.commit()
-        await self.db.refresh(db_threat)
-        
+        invalidate_threat_cache(db_threat.id)
         return db_threat
-    
-    async def delete_threat(self, threat_id: str) -> bool:
-        """Delete a threat"""
-        # Get existing threat
-        db_threat = await self.get_threat(threat_id)
-        if not db_threat:
+
+    async def delete_threat(self, threat_id: int) -> bool:
+        """Delete a threat with a single DELETE ... RETURNING; False if it does not exist"""
+        result = await self.db.execute(
+            delete(Threat).where(Threat.id == threat_id).returning(Threat.id),
+            execution_options={"synchronize_session": False},
+        )
+        deleted_id = result.scalar_one_or_none()
+        if deleted_id is None:
             return False
-        
-        # Delete threat
-        await self.db.delete(db_threat)
+
+        await self._delete_dependents([deleted_id])
         await self.db.commit()
-        
+        invalidate_threat_cache(deleted_id)
         return True
+
+    def _filter_statement(self, stmt: Any, threat_filter: ThreatFilter) -> Any:
+        """Apply a bulk operation's filter; refuses an empty one, which would match every threat"""
+        conditions = threat_filter.model_dump(exclude_none=True)
+        if not conditions:
+            raise ValueError("At least one filter condition is required")
+        threat_ids = conditions.pop("ids", None)
+        if threat_ids is not None:
+            stmt = stmt.where(any_of(Threat.id, threat_ids))
+        return self._apply_filters(stmt, **conditions)
+
+    async def bulk_update_threats(self, threat_filter: ThreatFilter, changes: ThreatBulkChanges) -> int:
+        """
+        Apply `changes` to every threat matching `threat_filter` in one UPDATE
+        statement and return how many were updated. Metadata is merged into
+        each threat's existing metadata rather than replacing it.
+        """
+        values = threat_values(changes.model_dump(exclude_none=True))
+        if not values:
+            raise ValueError("At least one value to update is required")
+        if "extra_metadata" in values:
+            values["extra_metadata"] = func.coalesce(Threat.extra_metadata, literal({}, JSONB)).op(
+                "||", return_type=JSONB
+            )(literal(values["extra_metadata"], JSONB))
+        values["updated_at"] = datetime.utcnow()
+
+        stmt = self._filter_statement(update(Threat), threat_filter)
+        result = await self.db.execute(
+            stmt.values(**values).returning(Threat.id),
+            execution_options={"synchronize_session": False},
+        )
+        threat_ids = result.scalars().all()
+        await self.db.commit()
+        invalidate_threat_cache(*threat_ids)
+        logger.info(f"Bulk-updated {len(threat_ids)} threats: {', '.join(sorted(values))}")
+        return len(threat_ids)
+
+    async def bulk_delete_threats(self, threat_filter: ThreatFilter) -> int:
+        """Delete every threat matching `threat_filter` in one DELETE statement and return how many were deleted"""
+        stmt = self._filter_statement(delete(Threat), threat_filter)
+        result = await self.db.execute(
+            stmt.returning(Threat.id),
+            execution_options={"synchronize_session": False},
+        )
+        threat_ids = result.scalars().all()
+        await self._delete_dependents(threat_ids)
+        await self.db.commit()
+        invalidate_threat_cache(*threat_ids)
+        logger.info(f"Bulk-deleted {len(threat_ids)} threats")
+        return len(threat_ids)
+
+    async def _delete_dependents(self, threat_ids: Sequence[int]) -> None:
+        """Delete rows keyed by threat_id; the partitioned threat table cannot be an FK target"""
+        if not threat_ids:
+            return
+        for model in (ThreatIOC, ThreatFingerprint, ThreatMinHash):
+            await self.db.execute(delete(model).where(any_of(model.threat_id, threat_ids)))
@@ -2,30 +2,40 @@
 Utility functions for storing threat data from data collection agents.
 Ensures all agent output is validated and persisted using the ThreatService.
 """
-from typing import Dict, Any, Optional
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any
+from loguru import logger
+from app.db.session import AsyncSessionLocal
 from app.schemas.threat import ThreatCreate
 from app.services.threat_service import ThreatService
+from app.services.threat_write_queue import threat_write_queue
 from app.models.threat import SeverityLevel, ThreatType
 import json
 
-async def store_agent_threat(
-    db_session: AsyncSession,
-    agent_output: Dict[str, Any],
-) -> Optional[int]:
+async def store_agent_threat(agent_output: Dict[str, Any]) -> bool:
     """
-    Validates and stores agent output as a Threat record using ThreatService.
-    Returns the new Threat ID if successful, else None.
+    Validates agent output and hands it to the threat write queue, which
+    upserts it in a batch in the background: output matching an already
+    stored threat's fingerprint is merged into it. Returns as soon as the
+    threat is queued (or once written, when the queue is not running, e.g.
+    outside the API process). Returns False if the output was rejected.
     """
     try:
         threat_data = map_agent_output_to_threat_create(agent_output)
-        service = ThreatService(db_session)
-        threat = await service.create_threat(threat_data)
-        return threat.id
     except Exception as e:
-        # Optional: Add logging here
-        print(f"[ThreatUtils] Failed to store threat: {e}")
-        return None
+        logger.error(f"[ThreatUtils] Rejected agent output: {e}")
+        return False
+
+    if threat_write_queue.accepts():
+        await threat_write_queue.enqueue(threat_data)
+        return True
+
+    try:
+        async with AsyncSessionLocal() as session:
+            await ThreatService(session).upsert_threat(threat_data)
+        return True
+    except Exception as e:
+        logger.error(f"[ThreatUtils] Failed to store threat: {e}")
+        return False
 
 def map_agent_output_to_threat_create(agent_output: Dict[str, Any]) -> ThreatCreate:
     """
@@ -102,7 +112,7 @@ def map_agent_output_to_threat_create(agent_output: Dict[str, Any]) -> ThreatCre
         confidence_score=confidence_to_float(threat_assessment.get("confidence", "low")),
         source_id=None, # Cannot derive from current agent output
         source_url=source_url,
-        raw_content=json.dumps(agent_output, indent=2), # Store full agent output as raw content
+        raw_content=json.dumps(agent_output, separators=(",", ":")), # Store full agent output (compact) as raw content
         iocs=iocs,
         ttps=ttps,
         metadata=extra_metadata,
@@ -0,0 +1,213 @@
+"""
+Write-behind queue for threats produced by the agent pipeline.
+
+Agent callbacks enqueue validated threats and return at once; a background
+worker upserts them in batches, one transaction per batch, flushing when a
+batch is full or its first item has waited THREAT_WRITE_FLUSH_INTERVAL_SECONDS.
+A full queue makes enqueue wait (backpressure) rather than grow without bound.
+On shutdown new threats are refused and the worker drains whatever is queued,
+including threats from producers still blocked on the full queue, before it
+exits; anything that cannot be drained in time is counted as failed.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.schemas.threat import ThreatCreate
+from app.services.threat_service import ThreatService
+
+
+class ThreatWriteQueue:
+    """Bounded queue of threats upserted in batches by a single background worker"""
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional["asyncio.Queue[Optional[ThreatCreate]]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+        # Producers waiting in enqueue for room in the queue
+        self._putters = 0
+        # Threats taken off the queue and not yet committed
+        self._batch: List[ThreatCreate] = []
+        self.enqueued = 0
+        self.created = 0
+        self.merged = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done() and not self._closing
+
+    def accepts(self) -> bool:
+        """Whether enqueue can be called from the current event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return self.running and loop is self._loop
+
+    def start(self) -> None:
+        """Start the worker on the running event loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._closing = False
+        self._batch = []
+        self._worker = asyncio.create_task(self._run())
+
+    async def enqueue(self, threat_data: ThreatCreate) -> None:
+        """
+        Queue a threat for writing, waiting while the queue is full. Threats
+        that cannot be stored are logged and counted when their batch is written.
+        """
+        if not self.accepts():
+            raise RuntimeError("Threat write queue is not running on this event loop")
+        self._putters += 1
+        try:
+            await self._queue.put(threat_data)
+        finally:
+            self._putters -= 1
+        self.enqueued += 1
+        if self._worker.done():
+            # Landed after stop() gave up on the worker: nothing will write it
+            lost = self._discard_queued()
+            logger.error(f"Threat write queue is stopped; dropped {lost} late threats")
+
+    async def stop(self, timeout: float) -> None:
+        """Stop accepting threats and wait up to `timeout` seconds for the queue to drain"""
+        if self._worker is None or self._worker.done():
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._finish(), timeout)
+        except asyncio.TimeoutError:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            # Threats taken off the queue for a batch that was never committed
+            lost = len(self._batch) + self._discard_queued()
+            self.failed += len(self._batch)
+            self._batch = []
+            logger.error(f"Threat write queue did not drain within {timeout}s; dropped {lost} queued threats")
+
+    async def _finish(self) -> None:
+        # The sentinel may itself wait behind producers on a full queue
+        await self._queue.put(None)
+        await asyncio.shield(self._worker)
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            stopping = await self._next_batch()
+            if self._batch:
+                await self._flush(self._batch)
+            self._batch = []
+
+    async def _next_batch(self) -> bool:
+        """
+        Collect up to batch_size threats in self._batch, waiting at most
+        flush_interval after the first; True once stop was requested, in
+        which case everything left is collected.
+        """
+        item = await self._queue.get()
+        if item is None:
+            await self._drain_remaining()
+            return True
+        self._batch.append(item)
+        deadline = self._loop.time() + self.flush_interval
+        while len(self._batch) < self.batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                await self._drain_remaining()
+                return True
+            self._batch.append(item)
+        return False
+
+    def _drain(self) -> List[ThreatCreate]:
+        items = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                items.append(item)
+        return items
+
+    async def _drain_remaining(self) -> None:
+        """
+        Add everything queued after the stop sentinel to the batch. Producers
+        that were blocked on the full queue are woken as it empties and land
+        here too, so the worker keeps taking items until none is left waiting.
+        """
+        self._batch.extend(self._drain())
+        while self._putters:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), 0.05)
+            except asyncio.TimeoutError:
+                continue
+            if item is not None:
+                self._batch.append(item)
+        self._batch.extend(self._drain())
+
+    def _discard_queued(self) -> int:
+        items = self._drain()
+        self.failed += len(items)
+        return len(items)
+
+    async def _flush(self, batch: List[ThreatCreate]) -> None:
+        """Upsert one batch in a single transaction; upsert_threats logs the threats it could not store"""
+        started = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as session:
+                outcomes = await ThreatService(session).upsert_threats(batch)
+        except Exception as e:
+            logger.error(f"Failed to write a batch of {len(batch)} threats: {e}")
+            outcomes = [None] * len(batch)
+
+        for outcome in outcomes:
+            if outcome is None:
+                self.failed += 1
+            elif outcome[1]:
+                self.created += 1
+            else:
+                self.merged += 1
+        self.batches += 1
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        logger.debug(f"Wrote {len(batch)} queued threats in {self.last_flush_ms:.1f} ms")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth and cumulative counters"""
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self.max_size,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+            "enqueued": self.enqueued,
+            "created": self.created,
+            "merged": self.merged,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+
+# Started and drained by the API's startup/shutdown hooks
+threat_write_queue = ThreatWriteQueue(
+    max_size=settings.THREAT_WRITE_QUEUE_MAX_SIZE,
+    batch_size=settings.THREAT_WRITE_BATCH_SIZE,
+    flush_interval=settings.THREAT_WRITE_FLUSH_INTERVAL_SECONDS,
+)
@@ -33,10 +33,13 @@ export function useDashboardData() {
     error.value = null
     
     try {
+      // Only fetch data inside the selected time range
+      const since = new Date(Date.now() - timeRangeToDays(timeRange) * 24 * 60 * 60 * 1000).toISOString()
+
       // Fetch threats and calculate metrics
       const threatResults = await api.threats.getAll({
         limit: 100,
-        // We'll use the timeRange to filter by date when the backend supports it
+        since,
       })
       
       threats.value = threatResults.slice(0, 5) // Get the 5 most recent for the table
@@ -65,6 +68,7 @@ export function useDashboardData() {
       // Get analysis results to count active campaigns
       const analysisResults = await api.analysis.getResults({
         limit: 100,
+        since,
       })
       
       // Update metrics